@@ -7,13 +7,176 @@ This file:
 3. Registers all routers
 4. Defines health check endpoints
 5. Sets up application metadata
+6. Initializes services on startup (lifespan)
 """
-from fastapi import FastAPI
+import logging
+import logging.handlers
+import os
+import queue
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
+import orjson
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 
 # Import routers
 from app.routers import upload, ask
+from app.services.http_client import (
+    get_http_client,
+    close_http_client,
+    get_async_http_client,
+    close_async_http_client
+)
+from app.services.embeddings import get_embedding_service
+from app.services.supabase_store import get_vector_store, close_vector_store
+from app.services.rag_pipeline import get_rag_pipeline
+
+# ============================================================================
+# LOGGING
+# ============================================================================
+
+# Log level for the "app" logger hierarchy (DEBUG shows per-request details)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Background thread that writes queued log records to stderr
+_log_listener = None
+
+logger = logging.getLogger(__name__)
+
+
+def setup_logging():
+    """
+    Configure logging for all "app.*" loggers.
+
+    Records are put on an in-memory queue and written to stderr by a
+    background QueueListener thread, so logging from inside an async
+    endpoint never blocks the event loop on console I/O.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    )
+
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(LOG_LEVEL)
+    app_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    app_logger.propagate = False
+
+    _log_listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _log_listener.start()
+
+
+# ============================================================================
+# STARTUP AND SHUTDOWN (LIFESPAN)
+# ============================================================================
+
+# Maximum number of worker threads for blocking calls (Supabase queries,
+# LLM requests) offloaded from async endpoints. AnyIO defaults to 40.
+THREAD_POOL_SIZE = int(os.getenv("THREAD_POOL_SIZE", "100"))
+
+
+def warm_up_services():
+    """
+    Exercise each service once so the first real request isn't slow.
+
+    Creating the services only builds the objects; the model weights,
+    tokenizer and HTTPS connection are set up lazily on first use.
+    We trigger that here:
+    - Embed a dummy query (loads the model and tokenizer onto the device)
+    - Run a tiny Supabase query (opens the keep-alive HTTPS connection)
+
+    The LLM is deliberately not called - that would bill a completion
+    on every worker start.
+    """
+    try:
+        get_embedding_service().embed_text("warmup")
+    except Exception as e:
+        logger.warning("Embedding warm-up failed: %s", e)
+
+    try:
+        vector_store = get_vector_store()
+        vector_store.supabase_client.table(vector_store.table_name).select(
+            "id"
+        ).limit(1).execute()
+    except Exception as e:
+        logger.warning("Supabase warm-up failed: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Runs once when the application starts (before `yield`)
+    and once when it shuts down (after `yield`).
+
+    On startup we:
+    - Set up logging
+    - Size the threadpool used for blocking calls
+    - Create the shared HTTP clients
+    - Load models and open service connections
+    - Warm up the embedding model and Supabase connection
+
+    On shutdown we:
+    - Close the shared HTTP clients and the Supabase connection pool
+    - Flush pending log records
+    """
+    setup_logging()
+
+    logger.info("🚀 Starting AI Document Assistant API...")
+
+    # Allow more blocking calls to run in parallel in the threadpool
+    # so concurrent /ask/ requests don't queue behind each other
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREAD_POOL_SIZE
+
+    # Pooled HTTP clients shared by all services (see http_client.py):
+    # sync for threadpool calls, async for streaming on the event loop
+    app.state.http = get_http_client()
+    app.state.async_http = get_async_http_client()
+
+    logger.info("📚 Loading services...")
+
+    # Initialize services so they're ready before the first request.
+    # Loading the embedding model and connecting to Supabase are blocking,
+    # so they run in the threadpool instead of stalling the event loop.
+    try:
+        # Each service depends on the previous one, so initialize in order
+        await anyio.to_thread.run_sync(get_embedding_service)
+        await anyio.to_thread.run_sync(get_vector_store)
+        await anyio.to_thread.run_sync(get_rag_pipeline)
+
+        logger.info("✅ All services initialized successfully")
+
+        # Pay the cold-start cost now instead of on the first request
+        await anyio.to_thread.run_sync(warm_up_services)
+
+        logger.info("🔥 Services warmed up")
+
+    except Exception as e:
+        logger.warning(
+            "Some services could not be initialized: %s "
+            "(make sure your .env file is configured correctly)", e
+        )
+
+    yield
+
+    logger.info("👋 Shutting down AI Document Assistant API...")
+
+    close_http_client()
+    await close_async_http_client()
+    close_vector_store()
+
+    # Flush any pending log records
+    if _log_listener is not None:
+        _log_listener.stop()
+
 
 # ============================================================================
 # APPLICATION SETUP
@@ -47,22 +210,59 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",  # Swagger UI
     redoc_url="/redoc",  # ReDoc UI
+    # Serialize JSON responses with orjson (much faster than the stdlib json
+    # encoder for large AskResponse bodies with many retrieved chunks)
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # ============================================================================
 # CORS CONFIGURATION
 # ============================================================================
 
-# Configure CORS to allow frontend applications to call this API
-# In production, replace "*" with your actual frontend domain
+# Frontend origins allowed to call this API (comma-separated in ALLOWED_ORIGINS)
+# Browsers reject "*" together with credentials, so origins must be explicit.
+# Example: ALLOWED_ORIGINS=https://yourdomain.com,http://localhost:3000
+ALLOWED_ORIGINS = tuple(
+    origin.strip()
+    for origin in os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
+    if origin.strip()
+)
+
+# Explicit lists let CORSMiddleware answer with simple set lookups
+# instead of echoing back whatever the browser asked for
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production: ["https://yourdomain.com"]
+    allow_origins=list(ALLOWED_ORIGINS),
     allow_credentials=True,
-    allow_methods=["*"],  # Allow all HTTP methods (GET, POST, etc.)
-    allow_headers=["*"],  # Allow all headers
+    allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization"],
 )
 
+# ============================================================================
+# RESPONSE COMPRESSION
+# ============================================================================
+
+# Streamed (Server-Sent Events) responses must reach the client as each
+# token is produced; gzip would hold them back in its compression buffer
+STREAMING_PATHS = frozenset({"/ask/stream"})
+
+
+class StreamingAwareGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that passes streaming endpoints through uncompressed."""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in STREAMING_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# /ask/ responses include the retrieved chunks and easily reach tens of KB
+# of very compressible JSON. Compress anything above 1 KB; small responses
+# (health checks, errors) aren't worth the CPU.
+app.add_middleware(StreamingAwareGZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # ============================================================================
 # REGISTER ROUTERS
 # ============================================================================
@@ -75,6 +275,52 @@ app.include_router(upload.router)
 # All endpoints in ask.py will be prefixed with /ask
 app.include_router(ask.router)
 
+# ============================================================================
+# PRECOMPUTED RESPONSES
+# ============================================================================
+
+# The root, health and error payloads are (almost) constant, so they are
+# serialized once at import time instead of on every request.
+
+_ROOT_BODY = orjson.dumps({
+    "message": "Welcome to AI Document Assistant API",
+    "version": "1.0.0",
+    "description": "A RAG-powered document question answering system",
+    "docs": "/docs",
+    "health": "/health",
+    "endpoints": {
+        "upload": "/upload/",
+        "ask": "/ask/",
+        "stats": "/upload/stats"
+    }
+})
+
+# Health probes (Docker, load balancers, monitoring) hit /health constantly.
+# The payload never changes, so we serialize it once at import time and let
+# proxies cache it for a short while via Cache-Control.
+HEALTH_CACHE_SECONDS = 30
+
+_HEALTH_BODY = orjson.dumps({
+    "status": "healthy",
+    "message": "AI Document Assistant API is running"
+})
+
+_HEALTH_HEADERS = {"Cache-Control": f"public, max-age={HEALTH_CACHE_SECONDS}"}
+
+# The 404 body only varies by the requested path, so we keep the static
+# parts as bytes and splice the JSON-encoded detail string in between
+_NOT_FOUND_PREFIX = b'{"error":"Endpoint not found","detail":'
+_NOT_FOUND_SUFFIX = b',"available_endpoints":' + orjson.dumps({
+    "docs": "/docs",
+    "upload": "/upload/",
+    "ask": "/ask/"
+}) + b"}"
+
+_INTERNAL_ERROR_BODY = orjson.dumps({
+    "error": "Internal server error",
+    "detail": "An unexpected error occurred. Please try again later."
+})
+
 # ============================================================================
 # ROOT ENDPOINTS
 # ============================================================================
@@ -97,18 +343,7 @@ async def root():
         }
         ```
     """
-    return {
-        "message": "Welcome to AI Document Assistant API",
-        "version": "1.0.0",
-        "description": "A RAG-powered document question answering system",
-        "docs": "/docs",
-        "health": "/health",
-        "endpoints": {
-            "upload": "/upload/",
-            "ask": "/ask/",
-            "stats": "/upload/stats"
-        }
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 
 @app.get("/health", tags=["root"])
@@ -122,6 +357,9 @@ async def health_check():
     - Load balancer health probes
     - Monitoring systems
 
+    The body is pre-serialized and sent with a short Cache-Control max-age,
+    so probes skip response serialization and proxies can answer for us.
+
     Example Response:
         ```json
         {
@@ -130,10 +368,11 @@ async def health_check():
         }
         ```
     """
-    return {
-        "status": "healthy",
-        "message": "AI Document Assistant API is running"
-    }
+    return Response(
+        content=_HEALTH_BODY,
+        media_type="application/json",
+        headers=_HEALTH_HEADERS
+    )
 
 
 # ============================================================================
@@ -148,17 +387,11 @@ async def not_found_handler(request, exc):
 
     Returns a user-friendly message when an endpoint is not found.
     """
-    return JSONResponse(
+    detail = orjson.dumps(f"The endpoint {request.url.path} does not exist")
+    return Response(
         status_code=404,
-        content={
-            "error": "Endpoint not found",
-            "detail": f"The endpoint {request.url.path} does not exist",
-            "available_endpoints": {
-                "docs": "/docs",
-                "upload": "/upload/",
-                "ask": "/ask/"
-            }
-        }
+        content=_NOT_FOUND_PREFIX + detail + _NOT_FOUND_SUFFIX,
+        media_type="application/json"
     )
 
 
@@ -169,66 +402,13 @@ async def internal_error_handler(request, exc):
 
     Returns a user-friendly message when an internal server error occurs.
     """
-    return JSONResponse(
+    return Response(
         status_code=500,
-        content={
-            "error": "Internal server error",
-            "detail": "An unexpected error occurred. Please try again later."
-        }
+        content=_INTERNAL_ERROR_BODY,
+        media_type="application/json"
     )
 
 
-# ============================================================================
-# STARTUP AND SHUTDOWN EVENTS
-# ============================================================================
-
-
-@app.on_event("startup")
-async def startup_event():
-    """
-    Runs when the application starts.
-
-    You can use this to:
-    - Initialize database connections
-    - Load models into memory
-    - Set up logging
-    - Validate environment variables
-    """
-    print("🚀 Starting AI Document Assistant API...")
-    print("📚 Loading services...")
-
-    # Optionally, you can initialize services here
-    # This ensures they're ready before the first request
-    try:
-        from app.services.embeddings import get_embedding_service
-        from app.services.supabase_store import get_vector_store
-        from app.services.rag_pipeline import get_rag_pipeline
-
-        # Initialize services
-        get_embedding_service()
-        get_vector_store()
-        get_rag_pipeline()
-
-        print("✅ All services initialized successfully")
-
-    except Exception as e:
-        print(f"⚠️  Warning: Some services could not be initialized: {e}")
-        print("   Make sure your .env file is configured correctly")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """
-    Runs when the application shuts down.
-
-    You can use this to:
-    - Close database connections
-    - Save state
-    - Clean up resources
-    """
-    print("👋 Shutting down AI Document Assistant API...")
-
-
 # ============================================================================
 # MAIN ENTRY POINT
 # ============================================================================
@@ -236,13 +416,32 @@ async def shutdown_event():
 if __name__ == "__main__":
     import uvicorn
 
-    # Run the application with Uvicorn
-    # This is useful for development
-    # In production, use: uvicorn app.main:app --host 0.0.0.0 --port 9000
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=9000,
-        reload=True,  # Auto-reload on code changes (development only)
-        log_level="info"
-    )
+    port = int(os.getenv("PORT", "9000"))
+
+    if os.getenv("ENVIRONMENT", "production") == "development":
+        # Development: single process with auto-reload on code changes
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=port,
+            reload=True,
+            log_level="info"
+        )
+    else:
+        # Production: several worker processes on uvloop + httptools.
+        # Defaults to 2 workers; override with WEB_CONCURRENCY. Every worker
+        # is a full copy of the app: it loads its own embedding model (a few
+        # hundred MB of RAM with torch) and runs its own pool of
+        # THREAD_POOL_SIZE threads, so memory grows linearly with workers.
+        # Embedding is CPU-bound, so more workers than cores doesn't help.
+        workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=port,
+            workers=workers,
+            loop="uvloop",
+            http="httptools",
+            log_level="info",
+            access_log=False  # Per-request access logs are costly at high RPS
+        )
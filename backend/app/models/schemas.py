@@ -3,7 +3,11 @@ Pydantic schemas for request and response validation.
 These models define the structure of data coming in and going out of our API.
 """
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+
+# Longest question accepted by the ask endpoints (characters)
+MAX_QUESTION_LENGTH = 4000
 
 
 # ============================================================================
@@ -44,13 +48,27 @@ class AskRequest(BaseModel):
         filename: Filter by filename (optional)
         use_latest_document: Query only the latest uploaded document (default: True)
     """
-    question: str = Field(..., description="The question to ask about your documents")
+    question: str = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_QUESTION_LENGTH,
+        description="The question to ask about your documents"
+    )
     max_results: int = Field(default=4, ge=1, le=10, description="Number of relevant chunks to retrieve")
     use_tool_calling: bool = Field(default=False, description="Enable tool/function calling")
     document_id: Optional[str] = Field(default=None, description="Filter results to specific document ID")
     filename: Optional[str] = Field(default=None, description="Filter results to specific filename")
     use_latest_document: bool = Field(default=True, description="Query only the most recently uploaded document")
 
+    @field_validator("question")
+    @classmethod
+    def strip_question(cls, value: str) -> str:
+        """Strip surrounding whitespace and reject blank questions."""
+        value = value.strip()
+        if not value:
+            raise ValueError("Question cannot be empty")
+        return value
+
 
 class RetrievedChunk(BaseModel):
     """
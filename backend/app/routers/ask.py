@@ -8,27 +8,214 @@ This endpoint:
 4. Sends question + context to LLM
 5. Returns AI-generated answer with sources
 """
-from typing import List
-from fastapi import APIRouter, HTTPException
+import hashlib
+import logging
+from typing import List, Optional, Tuple
+
+import orjson
+from cachetools import TTLCache
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from langchain_core.documents import Document
+from pydantic import ValidationError
 
 from app.models.schemas import (
     AskRequest,
     AskResponse,
-    RetrievedChunk,
-    ErrorResponse
+    ErrorResponse,
+    MAX_QUESTION_LENGTH
 )
 from app.services.rag_pipeline import get_rag_pipeline
+from app.services.supabase_store import LATEST_DOCUMENT
+
+logger = logging.getLogger(__name__)
 
 # Create router
 router = APIRouter(prefix="/ask", tags=["ask"])
 
+# Static health payload, serialized once at import time
+_HEALTH_BODY = orjson.dumps({
+    "status": "healthy",
+    "service": "ask"
+})
+
+_HEALTH_HEADERS = {"Cache-Control": "public, max-age=30"}
+
+# ============================================================================
+# ANSWER CACHE
+# ============================================================================
+
+# Answering a question costs an embedding, a vector search and an LLM call
+# (seconds). Identical questions against the same documents are common
+# (retries, demos, dashboards), so recent answers are kept in-process.
+#
+# Only answers scoped to a document_id are cached. The cache lives in each
+# worker process, and an upload or delete only clears the cache of the worker
+# that handled it. Every upload gets a new document_id and its chunks never
+# change afterwards, so these answers can't go stale. Answers about all
+# documents, a filename or the latest document can change with any upload,
+# and the other workers have no way to know about it. One limitation remains:
+# after a document is deleted, the other workers can keep answering
+# questions about it until their entries expire (ANSWER_CACHE_TTL).
+ANSWER_CACHE_SIZE = 512
+ANSWER_CACHE_TTL = 300  # seconds
+
+# Only touched from the event loop (never from threadpool workers),
+# so no lock is needed
+_ANSWER_CACHE: TTLCache = TTLCache(maxsize=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL)
+
+
+def _answer_cache_key(
+    question: str,
+    filter_document_id: Optional[str],
+    filter_source: Optional[str],
+    max_results: int,
+    use_tool_calling: bool
+) -> tuple:
+    """Build a hashable cache key for one /ask/ request."""
+    return (
+        hashlib.sha1(question.encode("utf-8")).digest(),
+        filter_document_id,
+        filter_source,
+        max_results,
+        use_tool_calling
+    )
+
+
+def clear_answer_cache() -> None:
+    """
+    Drop all cached answers.
+
+    Call this after documents are added or removed, since cached
+    answers may no longer match what's in the vector store.
+    """
+    _ANSWER_CACHE.clear()
+
+
+# ============================================================================
+# SHARED ASK LOGIC
+# ============================================================================
+
+# Metadata fields returned with each retrieved chunk. Chunks carry more
+# (file_type, chunk_total, ...) but clients only need these.
+_METADATA_FIELDS = ("source", "page", "document_id", "chunk_index")
+
+
+def _request_filters(request: AskRequest) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Work out which document(s) a request should search.
+
+    Returns:
+        (filter_document_id, filter_source) - plain values, passed straight
+        through as SQL parameters. Both None means "all documents".
+    """
+    if request.document_id:
+        # Filter by specific document ID
+        return request.document_id, None
+    if request.filename:
+        # Filter by filename
+        return None, request.filename
+    if request.use_latest_document:
+        # Query only the latest document (RECOMMENDED FOR CV/RESUME QUERIES)
+        # The vector store resolves "latest" inside the similarity-search
+        # query itself, so this costs no extra round-trip to Supabase
+        return None, LATEST_DOCUMENT
+    return None, None
+
+
+async def _run_ask(request: AskRequest) -> dict:
+    """
+    Answer a validated AskRequest using the RAG pipeline.
+
+    Shared by /ask/ and /ask/simple so filtering, caching and error
+    handling live in one place.
+
+    Returns:
+        AskResponse-shaped dict (answer, retrieved_chunks, tool_calls, tokens_used)
+
+    Raises:
+        HTTPException: 500 if retrieval or generation fails
+    """
+    try:
+        # Get RAG pipeline instance
+        rag = get_rag_pipeline()
+
+        # BUILD DOCUMENT FILTER to prevent cross-document contamination
+        filter_document_id, filter_source = _request_filters(request)
+
+        # Serve repeated questions from the answer cache
+        # (document_id-scoped questions only, see ANSWER CACHE above)
+        cacheable = filter_document_id is not None
+        cache_key = _answer_cache_key(
+            request.question,
+            filter_document_id,
+            filter_source,
+            request.max_results,
+            request.use_tool_calling
+        )
+        cached_payload = _ANSWER_CACHE.get(cache_key) if cacheable else None
+        if cached_payload is not None:
+            logger.debug("Answer cache hit")
+            return cached_payload
+
+        # Generate answer using RAG with document filtering
+        # (retrieval and the tool call run in parallel in the threadpool)
+        result = await rag.agenerate_answer(
+            question=request.question,
+            max_results=request.max_results,
+            use_tool_calling=request.use_tool_calling,
+            filter_document_id=filter_document_id,  # CRITICAL: Apply filter!
+            filter_source=filter_source
+        )
+
+        # Convert retrieved documents to plain dicts (RetrievedChunk shape)
+        retrieved_chunks = [
+            {
+                "content": doc.page_content,
+                "metadata": {
+                    key: doc.metadata[key] for key in _METADATA_FIELDS if key in doc.metadata
+                },
+                "similarity_score": round(score, 4) if score else None
+            }
+            for doc, score in result["retrieved_docs"]
+        ]
+
+        tool_calls = result.get("tool_calls")
+
+        # Build the AskResponse-shaped payload from plain data,
+        # skipping Pydantic validation of every chunk on the way out
+        payload = {
+            "answer": result["answer"],
+            "retrieved_chunks": retrieved_chunks,
+            "tool_calls": [call.model_dump() for call in tool_calls] if tool_calls else None,
+            "tokens_used": result.get("tokens_used")
+        }
+
+        # Payloads are never mutated after this point,
+        # so the same dict can be served to later requests
+        if cacheable:
+            _ANSWER_CACHE[cache_key] = payload
+
+        return payload
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Failed to process question",
+                "detail": str(e)
+            }
+        )
+
 
 @router.post(
     "/",
-    response_model=AskResponse,
+    # The handler returns an ORJSONResponse, so FastAPI doesn't re-validate
+    # the response; AskResponse is kept here for the OpenAPI docs only
+    response_model=None,
     responses={
-        400: {"model": ErrorResponse, "description": "Invalid request"},
+        200: {"model": AskResponse, "description": "Answer with sources"},
         500: {"model": ErrorResponse, "description": "Server error"}
     }
 )
@@ -100,98 +287,78 @@ async def ask_question(request: AskRequest):
         }
         ```
     """
-    # Validate question
-    if not request.question or len(request.question.strip()) == 0:
-        raise HTTPException(
-            status_code=400,
-            detail={
-                "error": "Invalid question",
-                "detail": "Question cannot be empty"
-            }
-        )
+    # The question is already stripped and checked for emptiness by
+    # AskRequest; invalid requests get a 422 before reaching this handler
+    payload = await _run_ask(request)
+
+    # Serialize with orjson directly, skipping FastAPI's jsonable_encoder pass
+    return ORJSONResponse(payload)
+
+
+async def _stream_events(request: AskRequest):
+    """
+    Stream an answer as Server-Sent Events.
+
+    Each piece of the answer is sent as `data: {"token": "..."}`, followed
+    by a final `event: done`. The HTTP status is already sent once
+    streaming begins, so failures are reported as an `event: error`.
+    """
+    filter_document_id, filter_source = _request_filters(request)
 
     try:
-        # Get RAG pipeline instance
         rag = get_rag_pipeline()
 
-        # BUILD DOCUMENT FILTER to prevent cross-document contamination
-        document_filter = None
-
-        if request.document_id:
-            # Filter by specific document ID
-            document_filter = {"document_id": request.document_id}
-        elif request.filename:
-            # Filter by filename
-            document_filter = {"source": request.filename}
-        elif request.use_latest_document:
-            # Query only the latest document (RECOMMENDED FOR CV/RESUME QUERIES)
-            # Get the most recently uploaded filename
-            from app.services.supabase_store import get_vector_store
-            vector_store = get_vector_store()
-
-            try:
-                # Get the latest document by querying metadata
-                # The metadata is stored as JSONB, so we need to extract the source field
-                latest_doc_response = vector_store.supabase_client.table("documents").select(
-                    "metadata, id"
-                ).order("id", desc=True).limit(1).execute()
-
-                print(f"📊 Latest doc query response: {latest_doc_response.data}")
-
-                if latest_doc_response.data and len(latest_doc_response.data) > 0:
-                    metadata = latest_doc_response.data[0].get("metadata", {})
-                    latest_filename = metadata.get("source")
-
-                    if latest_filename:
-                        document_filter = {"source": latest_filename}
-                        print(f"🎯 FILTERING TO LATEST DOCUMENT: {latest_filename}")
-                        print(f"🔍 Filter being applied: {document_filter}")
-                    else:
-                        print(f"⚠️ No 'source' found in metadata: {metadata}")
-                else:
-                    print("⚠️ No documents found in database")
-            except Exception as e:
-                print(f"❌ Error determining latest document: {e}")
-                import traceback
-                traceback.print_exc()
-                # Continue without filter (query all documents)
-
-        # Generate answer using RAG with document filtering
-        result = rag.generate_answer(
+        async for token in rag.astream_answer(
             question=request.question,
             max_results=request.max_results,
             use_tool_calling=request.use_tool_calling,
-            document_filter=document_filter  # CRITICAL: Apply filter!
-        )
+            filter_document_id=filter_document_id,
+            filter_source=filter_source
+        ):
+            yield b"data: " + orjson.dumps({"token": token}) + b"\n\n"
 
-        # Convert retrieved documents to RetrievedChunk schema
-        retrieved_chunks = []
-        for doc, score in result["retrieved_docs"]:
-            chunk = RetrievedChunk(
-                content=doc.page_content,
-                metadata=doc.metadata,
-                similarity_score=round(score, 4) if score else None
-            )
-            retrieved_chunks.append(chunk)
-
-        # Build response
-        response = AskResponse(
-            answer=result["answer"],
-            retrieved_chunks=retrieved_chunks,
-            tool_calls=result.get("tool_calls"),
-            tokens_used=result.get("tokens_used")
-        )
+    except Exception as e:
+        logger.exception("Streaming answer failed")
+        error = {"error": "Failed to process question", "detail": str(e)}
+        yield b"event: error\ndata: " + orjson.dumps(error) + b"\n\n"
+        return
 
-        return response
+    yield b"event: done\ndata: {}\n\n"
 
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "error": "Failed to process question",
-                "detail": str(e)
-            }
-        )
+
+@router.post("/stream")
+async def ask_question_stream(request: AskRequest):
+    """
+    Ask a question and stream the answer as it is generated.
+
+    Takes the same request body as /ask/, but instead of waiting for the
+    full answer it returns a `text/event-stream` response: the first
+    tokens arrive as soon as the LLM produces them. Streamed answers
+    are not cached and don't include the retrieved chunks.
+
+    Example Usage:
+        ```bash
+        curl -N -X POST "http://localhost:8000/ask/stream" \\
+             -H "Content-Type: application/json" \\
+             -d '{"question": "What is the refund policy?"}'
+        ```
+
+    Example Response:
+        ```
+        data: {"token":"According"}
+
+        data: {"token":" to the documentation"}
+
+        event: done
+        data: {}
+        ```
+    """
+    return StreamingResponse(
+        _stream_events(request),
+        media_type="text/event-stream",
+        # Tell proxies (e.g. nginx) not to buffer the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/health")
@@ -210,14 +377,22 @@ async def health_check():
         }
         ```
     """
-    return {
-        "status": "healthy",
-        "service": "ask"
-    }
+    return Response(
+        content=_HEALTH_BODY,
+        media_type="application/json",
+        headers=_HEALTH_HEADERS
+    )
 
 
 @router.post("/simple")
-async def ask_simple(question: str):
+async def ask_simple(
+    question: str = Query(
+        ...,
+        min_length=1,
+        max_length=MAX_QUESTION_LENGTH,
+        description="The question to ask"
+    )
+):
     """
     Simplified ask endpoint that accepts just a question string.
 
@@ -242,32 +417,16 @@ async def ask_simple(question: str):
         }
         ```
     """
+    # Funnel into the same validated path as /ask/ (including the answer
+    # cache). /ask/simple has always searched across all documents.
     try:
-        # Use default settings
-        request = AskRequest(
-            question=question,
-            max_results=4,
-            use_tool_calling=False
-        )
-
-        # Get answer
-        rag = get_rag_pipeline()
-        result = rag.generate_answer(
-            question=request.question,
-            max_results=request.max_results,
-            use_tool_calling=request.use_tool_calling
-        )
+        request = AskRequest(question=question, use_latest_document=False)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
 
-        # Return simple response
-        return {
-            "answer": result["answer"]
-        }
+    payload = await _run_ask(request)
 
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "error": "Failed to process question",
-                "detail": str(e)
-            }
-        )
+    # Return simple response
+    return {
+        "answer": payload["answer"]
+    }
@@ -8,27 +8,46 @@ This endpoint:
 4. Generates embeddings
 5. Stores everything in Supabase
 """
+import functools
 import os
 import uuid
 import tempfile
 from typing import List
+
+import aiofiles
+import anyio.to_thread
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from langchain_core.documents import Document
 from langchain_community.document_loaders import (
-    PyPDFLoader,
+    PyMuPDFLoader,
     UnstructuredWordDocumentLoader,
     TextLoader
 )
+from langchain_community.document_loaders.blob_loaders import Blob
+from langchain_community.document_loaders.parsers import PyMuPDFParser
 
 from app.models.schemas import UploadResponse, ErrorResponse
 from app.utils.chunker import chunk_documents
 from app.services.supabase_store import get_vector_store
+from app.routers.ask import clear_answer_cache
 
 # Create router
 router = APIRouter(prefix="/upload", tags=["upload"])
 
 # Allowed file extensions
-ALLOWED_EXTENSIONS = {".pdf", ".docx", ".doc", ".txt"}
+ALLOWED_EXTENSIONS = frozenset({".pdf", ".docx", ".doc", ".txt"})
+
+# File types parsed straight from the uploaded bytes; the others
+# (Word files) need a path on disk for their loader
+IN_MEMORY_EXTENSIONS = frozenset({".pdf", ".txt"})
+
+# Uploads are copied to disk in chunks of this size (1 MB)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Chunks are embedded and stored in batches of this size, with up to
+# MAX_CONCURRENT_BATCHES batches in flight at once
+STORE_BATCH_SIZE = 64
+MAX_CONCURRENT_BATCHES = 5
 
 
 def get_file_extension(filename: str) -> str:
@@ -44,6 +63,17 @@ def get_file_extension(filename: str) -> str:
     return os.path.splitext(filename)[1].lower()
 
 
+# LangChain loader for each file type, called with the file's path
+_LOADERS = {
+    # PyMuPDFLoader extracts text page by page using the C-based MuPDF
+    # library, which is much faster than pure-Python PDF parsers
+    ".pdf": PyMuPDFLoader,
+    ".docx": UnstructuredWordDocumentLoader,
+    ".doc": UnstructuredWordDocumentLoader,
+    ".txt": lambda path: TextLoader(path, encoding="utf-8"),
+}
+
+
 def load_document(file_path: str, filename: str) -> List[Document]:
     """
     Load a document using the appropriate LangChain loader.
@@ -61,25 +91,75 @@ def load_document(file_path: str, filename: str) -> List[Document]:
     extension = get_file_extension(filename)
 
     try:
-        if extension == ".pdf":
-            # Use PyPDFLoader for PDF files
-            # This extracts text page by page
-            loader = PyPDFLoader(file_path)
-            documents = loader.load()
-
-        elif extension in [".docx", ".doc"]:
-            # Use UnstructuredWordDocumentLoader for Word files
-            loader = UnstructuredWordDocumentLoader(file_path)
-            documents = loader.load()
-
-        elif extension == ".txt":
-            # Use TextLoader for plain text files
-            loader = TextLoader(file_path, encoding="utf-8")
-            documents = loader.load()
-
-        else:
+        loader_cls = _LOADERS.get(extension)
+        if loader_cls is None:
             raise ValueError(f"Unsupported file type: {extension}")
 
+        documents = loader_cls(file_path).load()
+
+        # Add filename to metadata for all documents
+        for doc in documents:
+            doc.metadata["source"] = filename
+            doc.metadata["file_type"] = extension
+
+        return documents
+
+    except Exception as e:
+        raise ValueError(f"Error loading document: {str(e)}")
+
+
+def _parse_pdf_bytes(content: bytes, filename: str) -> List[Document]:
+    # Same parser PyMuPDFLoader uses, fed from memory
+    # (MuPDF opens the bytes as a stream, page by page)
+    return PyMuPDFParser().parse(Blob.from_data(content, path=filename))
+
+
+def _parse_text_bytes(content: bytes, filename: str) -> List[Document]:
+    # Plain text needs no parsing, just decoding
+    try:
+        text = content.decode("utf-8")
+    except UnicodeDecodeError:
+        # ValueError -> 400 in upload_document, like other unreadable files
+        raise ValueError(f"{filename} is not valid UTF-8 text")
+    # Normalize Windows (\r\n) and old Mac (\r) line endings, so chunking
+    # splits on paragraphs the same way for every file
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return [Document(page_content=text, metadata={})]
+
+
+# In-memory parser for each IN_MEMORY_EXTENSIONS file type
+_BYTES_PARSERS = {
+    ".pdf": _parse_pdf_bytes,
+    ".txt": _parse_text_bytes,
+}
+
+
+def load_document_from_bytes(content: bytes, filename: str) -> List[Document]:
+    """
+    Load a PDF or text document directly from its bytes.
+
+    Same result as load_document, but without writing the upload to a
+    temporary file and reading it back first.
+
+    Args:
+        content: The raw file contents
+        filename: Original filename (used to determine file type)
+
+    Returns:
+        List of Document objects
+
+    Raises:
+        ValueError: If file type can't be loaded from memory
+    """
+    extension = get_file_extension(filename)
+
+    try:
+        parse = _BYTES_PARSERS.get(extension)
+        if parse is None:
+            raise ValueError(f"Unsupported file type for in-memory loading: {extension}")
+
+        documents = parse(content, filename)
+
         # Add filename to metadata for all documents
         for doc in documents:
             doc.metadata["source"] = filename
@@ -91,6 +171,56 @@ def load_document(file_path: str, filename: str) -> List[Document]:
         raise ValueError(f"Error loading document: {str(e)}")
 
 
+async def extract_documents(file: UploadFile, extension: str) -> List[Document]:
+    """
+    Read an uploaded file and extract its text as Documents.
+
+    PDF and text files are parsed straight from memory. Word files have to
+    be saved to disk first, because their LangChain loader needs a path.
+
+    Args:
+        file: The uploaded file
+        extension: The file's (validated) extension
+
+    Returns:
+        List of Document objects
+
+    Raises:
+        HTTPException: 500 if a Word file can't be saved to disk
+        ValueError: If the document can't be loaded
+    """
+    if extension in IN_MEMORY_EXTENSIONS:
+        content = await file.read()
+        return await anyio.to_thread.run_sync(
+            load_document_from_bytes, content, file.filename
+        )
+
+    # The temporary directory and everything in it is deleted when the
+    # block exits, whether loading succeeded or raised - no manual cleanup
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_file_path = os.path.join(tmp_dir, f"upload{extension}")
+
+        try:
+            # Stream the upload to disk in fixed-size chunks, so memory use stays
+            # flat regardless of file size and the event loop isn't blocked on writes
+            async with aiofiles.open(tmp_file_path, "wb") as tmp_file:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    await tmp_file.write(chunk)
+
+        except OSError as e:
+            raise HTTPException(
+                status_code=500,
+                detail={
+                    "error": "Failed to save file",
+                    "detail": str(e)
+                }
+            )
+
+        return await anyio.to_thread.run_sync(
+            load_document, tmp_file_path, file.filename
+        )
+
+
 @router.post(
     "/",
     response_model=UploadResponse,
@@ -107,7 +237,7 @@ async def upload_document(
 
     This endpoint performs the following steps:
     1. Validates the file type
-    2. Saves the file temporarily
+    2. Reads the file (Word files are saved temporarily)
     3. Extracts text using LangChain document loaders
     4. Chunks the text into smaller pieces
     5. Generates embeddings for each chunk
@@ -147,42 +277,28 @@ async def upload_document(
             status_code=400,
             detail={
                 "error": "Invalid file type",
-                "detail": f"Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
+                "detail": f"Allowed types: {', '.join(sorted(ALLOWED_EXTENSIONS))}"
             }
         )
 
-    # Step 2: Save file temporarily
-    # We need to save the uploaded file to disk so LangChain loaders can read it
     try:
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=extension) as tmp_file:
-            # Read uploaded file content
-            content = await file.read()
-
-            # Write to temporary file
-            tmp_file.write(content)
-            tmp_file_path = tmp_file.name
+        # Steps 3-6 are CPU-heavy (parsing, chunking, embedding) or blocking
+        # network calls, so they run in the threadpool to keep the event loop
+        # free for other requests while a large document is processed
 
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "error": "Failed to save file",
-                "detail": str(e)
-            }
-        )
-
-    try:
-        # Step 3: Load and extract text from document
-        documents = load_document(tmp_file_path, file.filename)
+        # Step 2 & 3: Read the file, then load and extract text from it
+        documents = await extract_documents(file, extension)
 
         # Step 4: Chunk the documents with IMPROVED strategy
         # Smaller chunks (500) for better precision
         # Less overlap (100) to avoid redundancy
-        chunked_docs = chunk_documents(
-            documents,
-            chunk_size=500,
-            chunk_overlap=100
+        chunked_docs = await anyio.to_thread.run_sync(
+            functools.partial(
+                chunk_documents,
+                documents,
+                chunk_size=500,
+                chunk_overlap=100
+            )
         )
 
         # Generate a unique document ID
@@ -193,14 +309,18 @@ async def upload_document(
             doc.metadata["document_id"] = document_id
 
         # Step 5 & 6: Generate embeddings and store in Supabase
-        # The vector store handles this automatically
+        # The vector store handles this, several batches at a time
         vector_store = get_vector_store()
-        chunk_ids = vector_store.store_documents(chunked_docs)
+        chunk_ids = await vector_store.astore_documents(
+            chunked_docs,
+            batch_size=STORE_BATCH_SIZE,
+            max_concurrency=MAX_CONCURRENT_BATCHES
+        )
 
-        # Step 7: Clean up temporary file
-        os.unlink(tmp_file_path)
+        # Cached answers may not reflect the new document
+        clear_answer_cache()
 
-        # Step 8: Return success response
+        # Step 7: Return success response
         return UploadResponse(
             message="Document uploaded successfully",
             filename=file.filename,
@@ -208,11 +328,10 @@ async def upload_document(
             document_id=document_id
         )
 
-    except ValueError as e:
-        # Clean up temp file on error
-        if os.path.exists(tmp_file_path):
-            os.unlink(tmp_file_path)
+    except HTTPException:
+        raise
 
+    except ValueError as e:
         raise HTTPException(
             status_code=400,
             detail={
@@ -222,10 +341,6 @@ async def upload_document(
         )
 
     except Exception as e:
-        # Clean up temp file on error
-        if os.path.exists(tmp_file_path):
-            os.unlink(tmp_file_path)
-
         raise HTTPException(
             status_code=500,
             detail={
@@ -247,7 +362,21 @@ async def get_upload_stats():
         ```json
         {
             "total_documents": 42,
-            "table_name": "documents"
+            "table_name": "documents",
+            "query_cache": {
+                "size": 12,
+                "max_size": 2000,
+                "hits": 30,
+                "misses": 12,
+                "evictions": 0,
+                "generation": 3
+            },
+            "semantic_cache": {
+                "size": 10,
+                "threshold": 0.95,
+                "hits": 4,
+                "misses": 10
+            }
         }
         ```
     """
@@ -276,29 +405,27 @@ async def list_all_documents():
     try:
         vector_store = get_vector_store()
 
-        # Get all unique document sources
-        response = vector_store.supabase_client.table("documents").select(
-            "id, metadata"
-        ).order("id", desc=True).execute()
+        # Get one row per unique document source
+        # De-duplicated in Postgres (see document_management.sql),
+        # so we don't download every chunk just to list the files
+        response = await anyio.to_thread.run_sync(
+            vector_store.supabase_client.rpc("list_unique_documents", {}).execute
+        )
 
         documents = []
-        seen_sources = set()
+        total_chunks = 0
 
         for row in response.data:
-            metadata = row.get("metadata", {})
-            source = metadata.get("source", "Unknown")
-
-            if source not in seen_sources:
-                seen_sources.add(source)
-                documents.append({
-                    "filename": source,
-                    "document_id": metadata.get("document_id"),
-                    "file_type": metadata.get("file_type"),
-                    "id": row.get("id")
-                })
+            total_chunks += row.get("chunk_count") or 0
+            documents.append({
+                "filename": row.get("filename") or "Unknown",
+                "document_id": row.get("document_id"),
+                "file_type": row.get("file_type"),
+                "id": row.get("id")
+            })
 
         return {
-            "total_chunks": len(response.data),
+            "total_chunks": total_chunks,
             "unique_documents": len(documents),
             "documents": documents
         }
@@ -362,11 +489,14 @@ async def clear_all_documents():
     try:
         vector_store = get_vector_store()
 
-        # Delete all rows from documents table
-        # Use minimum UUID to match all rows (works with UUID primary key)
-        delete_response = vector_store.supabase_client.table("documents").delete().gte(
-            "id", "00000000-0000-0000-0000-000000000000"  # Match all UUIDs
-        ).execute()
+        # Empty the documents table with TRUNCATE (see document_management.sql)
+        # Unlike a DELETE matching every row, this doesn't scan the table
+        await anyio.to_thread.run_sync(
+            vector_store.supabase_client.rpc("truncate_documents", {}).execute
+        )
+
+        vector_store.clear_search_cache()
+        clear_answer_cache()
 
         return {
             "message": "All documents deleted",
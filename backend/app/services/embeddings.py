@@ -3,12 +3,44 @@ Embedding service using HuggingFace (free, local embeddings).
 """
 
 import os
-from typing import List
+import threading
+from functools import lru_cache
+from typing import List, Tuple
+import numpy as np
+import torch
 from dotenv import load_dotenv
 from langchain_huggingface import HuggingFaceEmbeddings
 
 load_dotenv()
 
+# Number of texts encoded per forward pass (0 = pick based on device).
+# sentence-transformers sorts each encode() call by text length before
+# batching (and restores the input order afterwards), so every micro-batch
+# holds similarly sized chunks and little compute is wasted on padding.
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "0"))
+
+# Force a device ("cpu", "cuda", "mps"); auto-detected when unset
+EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE")
+
+# How many distinct query embeddings to keep in memory
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048"))
+
+
+def detect_device() -> str:
+    """
+    Pick the fastest available device for running the embedding model.
+
+    Returns:
+        "cuda" (NVIDIA GPU), "mps" (Apple Silicon GPU) or "cpu"
+    """
+    if EMBEDDING_DEVICE:
+        return EMBEDDING_DEVICE
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
 
 class EmbeddingService:
     """
@@ -25,24 +57,71 @@ class EmbeddingService:
         - 384 dimensions
         - Good quality for most tasks
         - Runs locally (no API key needed!)
+
+        The model runs on a GPU (CUDA or Apple MPS) in half precision when
+        one is available, and on the CPU in full precision otherwise.
         """
+        self.device = detect_device()
+        use_gpu = self.device != "cpu"
+
+        # GPUs have the memory and parallelism for bigger batches
+        batch_size = EMBEDDING_BATCH_SIZE or (128 if use_gpu else 64)
 
         # Use HuggingFace embeddings (local, free)
         self.embeddings = HuggingFaceEmbeddings(
             model_name=model,
-            model_kwargs={'device': 'cpu'},  # Use 'mps' for Mac GPU if available
-            encode_kwargs={'normalize_embeddings': True}
+            model_kwargs={'device': self.device},
+            encode_kwargs={
+                'normalize_embeddings': True,
+                'batch_size': batch_size,
+                'convert_to_numpy': True
+            }
         )
 
+        # FP16 roughly doubles GPU throughput with no meaningful quality loss
+        # for similarity search (_client is the underlying SentenceTransformer)
+        if use_gpu:
+            self.embeddings._client.half()
+
         self.model = model
 
+        # Per-instance LRU cache of query embeddings (stored as immutable
+        # tuples, so a cached vector can't be modified by a caller)
+        self._embed_query_cached = lru_cache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)(
+            lambda text: tuple(self.embeddings.embed_query(text))
+        )
+
     def embed_text(self, text: str) -> List[float]:
         """Embed a single text."""
         return self.embeddings.embed_query(text)
 
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """Embed multiple texts."""
-        return self.embeddings.embed_documents(texts)
+    def embed_text_cached(self, text: str) -> Tuple[float, ...]:
+        """
+        Embed a single text, reusing the result for repeated texts.
+
+        Users often ask the same question more than once; a cache hit skips
+        the model forward pass entirely (tens of ms on CPU).
+        """
+        return self._embed_query_cached(text)
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed multiple texts.
+
+        Texts are encoded in length-sorted micro-batches;
+        results come back in input order.
+
+        Calls the SentenceTransformer directly and returns its float32
+        array of shape (len(texts), dimension). LangChain's embed_documents
+        would convert it to nested Python lists (one float object per
+        dimension), which costs time and ~8x the memory.
+        """
+        # Same preprocessing and encode settings as HuggingFaceEmbeddings
+        texts = [text.replace("\n", " ") for text in texts]
+        embeddings = self.embeddings._client.encode(texts, **self.embeddings.encode_kwargs)
+
+        # The model runs in FP16 on GPU; store full-precision floats
+        return embeddings.astype(np.float32, copy=False)
 
     def get_embedding_dimension(self) -> int:
         """Return dimension based on model."""
@@ -57,9 +136,16 @@ class EmbeddingService:
 # Singleton
 _embedding_service = None
 
+# Guards creation of the singleton: without it, two threads calling
+# get_embedding_service() at startup could both load the model
+_embedding_service_lock = threading.Lock()
+
 
 def get_embedding_service() -> EmbeddingService:
     global _embedding_service
     if _embedding_service is None:
-        _embedding_service = EmbeddingService()
+        with _embedding_service_lock:
+            # Re-check: another thread may have created it while we waited
+            if _embedding_service is None:
+                _embedding_service = EmbeddingService()
     return _embedding_service
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Shared HTTP clients for outbound API calls (OpenRouter LLM requests).
+
+Why share one client?
+Every httpx client owns its own connection pool. Reusing a single client
+across services and requests keeps TCP/TLS connections alive between calls
+and lets HTTP/2 multiplex concurrent requests over the same socket, instead
+of paying a new handshake each time.
+"""
+import threading
+
+import httpx
+
+# Connection pool sizing (per worker process)
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 50
+
+
+# Global instances for easy access
+_http_client = None
+_async_http_client = None
+
+# Guards creation of the clients, so concurrent first calls share one pool
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Get or create the global HTTP client.
+
+    The client is synchronous because the LLM calls run in the threadpool
+    (see the /ask/ router); httpx.Client is safe to share between threads.
+
+    Returns:
+        The shared httpx.Client instance
+    """
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = httpx.Client(
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_connections=MAX_CONNECTIONS,
+                        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS
+                    )
+                )
+    return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Get or create the global async HTTP client.
+
+    Used by async LLM calls (e.g. streaming answers with astream), which
+    run on the event loop instead of in the threadpool.
+
+    Returns:
+        The shared httpx.AsyncClient instance
+    """
+    global _async_http_client
+    if _async_http_client is None:
+        with _http_client_lock:
+            if _async_http_client is None:
+                _async_http_client = httpx.AsyncClient(
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_connections=MAX_CONNECTIONS,
+                        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS
+                    )
+                )
+    return _async_http_client
+
+
+def close_http_client() -> None:
+    """
+    Close the global HTTP client and its pooled connections.
+
+    Called on application shutdown.
+    """
+    global _http_client
+    if _http_client is not None:
+        _http_client.close()
+        _http_client = None
+
+
+async def close_async_http_client() -> None:
+    """
+    Close the global async HTTP client and its pooled connections.
+
+    Called on application shutdown.
+    """
+    global _async_http_client
+    if _async_http_client is not None:
+        await _async_http_client.aclose()
+        _async_http_client = None
@@ -0,0 +1,309 @@
+"""
+In-process cache for vector search results.
+
+Why cache searches?
+A search costs a query embedding (tens of ms on CPU) plus a round-trip to
+Supabase. Interactive use repeats the same questions a lot (retries,
+follow-ups, several users asking the same thing), so recent results are
+kept in memory and served without touching the model or the database.
+
+Invalidation:
+Storing or deleting documents clears the cache and bumps a "generation"
+number that is part of every key. A search that was already running
+during the change carries the old generation, so its (possibly stale)
+results are not cached afterwards.
+Each worker process has its own cache and only sees its own invalidations,
+so callers should only cache results that other workers' uploads can't
+change (the vector store caches document_id-scoped searches only).
+
+Semantic cache:
+Users often rephrase a question ("refund policy?" / "what's the policy on
+refunds"). The exact-key cache misses those, so SemanticQueryCache also
+matches a new query against the embeddings of recently cached queries and
+reuses the results when they are nearly identical (cosine >= threshold).
+Near-identical query embeddings retrieve (almost) the same chunks anyway.
+"""
+import threading
+import time
+from typing import Any, Hashable, List, Optional, Sequence
+
+import numpy as np
+from cachetools import TTLCache
+
+
+class _CountingTTLCache(TTLCache):
+    """TTLCache that counts entries evicted to make room for new ones."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.evictions = 0
+
+    def popitem(self):
+        # cachetools calls popitem() only when the cache is full
+        self.evictions += 1
+        return super().popitem()
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache with a time-to-live for search results.
+
+    Searches run in threadpool workers, so all access goes through a lock.
+
+    Example:
+        >>> cache = QueryCache(max_size=2000, ttl_seconds=300)
+        >>> key = cache.make_key("What is the refund policy?", 4)
+        >>> cache.get(key) is None
+        True
+        >>> cache.set(key, results)
+    """
+
+    def __init__(self, max_size: int = 2000, ttl_seconds: float = 300):
+        """
+        Args:
+            max_size: Maximum number of cached searches (least recently
+                      used entries are evicted first)
+            ttl_seconds: How long an entry stays valid (default: 5 minutes)
+        """
+        self._cache = _CountingTTLCache(maxsize=max_size, ttl=ttl_seconds)
+        self._lock = threading.RLock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """
+        Normalize a query so trivially different spellings share an entry.
+
+        The embedding model is uncased and ignores extra whitespace, so
+        lowercasing and collapsing whitespace doesn't change its results.
+        """
+        return " ".join(query.lower().split())
+
+    def make_key(self, query: str, *params: Hashable) -> tuple:
+        """
+        Build a cache key for a query and the search parameters.
+
+        Args:
+            query: The search query
+            *params: Everything else the results depend on (k, filters, ...)
+
+        Returns:
+            A hashable key, tied to the current generation
+        """
+        with self._lock:
+            generation = self._generation
+        return (generation, self.normalize_query(query), *params)
+
+    @staticmethod
+    def make_scope_key(key: tuple) -> tuple:
+        """
+        Strip the query text from a key built by make_key.
+
+        The result identifies the search parameters (and generation) only,
+        which is how SemanticQueryCache groups queries it may match.
+
+        Args:
+            key: A key returned by make_key
+
+        Returns:
+            A hashable key with the same generation and params, without the query
+        """
+        generation, _query, *params = key
+        return (generation, *params)
+
+    def get(self, key: tuple) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss (or expiry)."""
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key: tuple, value: Any) -> None:
+        """Cache a value (evicting the least recently used entry if full)."""
+        with self._lock:
+            # Skip results computed before an invalidation
+            if key[0] == self._generation:
+                self._cache[key] = value
+
+    def invalidate(self) -> None:
+        """
+        Make every cached entry stale.
+
+        Call this after documents are added or removed.
+        """
+        with self._lock:
+            self._generation += 1
+
+            # clear() goes through popitem(); those aren't evictions
+            evictions = self._cache.evictions
+            self._cache.clear()
+            self._cache.evictions = evictions
+
+    def stats(self) -> dict:
+        """Return hit/miss/eviction counters, for tuning the cache size and TTL."""
+        with self._lock:
+            return {
+                "size": len(self._cache),
+                "max_size": self._cache.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self._cache.evictions,
+                "generation": self._generation
+            }
+
+
+class _SemanticScope:
+    """
+    Cached query embeddings and results for one set of search parameters.
+
+    Embeddings live in one contiguous float32 matrix, so a lookup is a
+    single BLAS matrix-vector product. The matrix is preallocated and grows
+    by doubling up to max_entries; after that it is used as a ring buffer:
+    the oldest row is overwritten in place instead of copying the matrix.
+    """
+
+    INITIAL_CAPACITY = 16
+
+    def __init__(self, dimension: int, max_entries: int):
+        capacity = min(self.INITIAL_CAPACITY, max_entries)
+        self.max_entries = max_entries
+        self.embeddings = np.empty((capacity, dimension), dtype=np.float32)
+        self.results: List[Any] = [None] * capacity
+        self.created = np.empty(capacity, dtype=np.float64)
+        self.count = 0  # rows in use
+        self.next_row = 0  # row the next entry is written to
+
+    def add(self, embedding: np.ndarray, results: Any, created: float) -> None:
+        if self.count == len(self.results) and self.count < self.max_entries:
+            capacity = min(self.count * 2, self.max_entries)
+            embeddings = np.empty((capacity, self.embeddings.shape[1]), dtype=np.float32)
+            embeddings[:self.count] = self.embeddings
+            self.embeddings = embeddings
+            self.results.extend([None] * (capacity - self.count))
+            self.created = np.resize(self.created, capacity)
+            self.next_row = self.count
+
+        row = self.next_row
+        self.embeddings[row] = embedding
+        self.results[row] = results
+        self.created[row] = created
+
+        self.count = min(self.count + 1, self.max_entries)
+        self.next_row = (row + 1) % len(self.results)
+
+
+class SemanticQueryCache:
+    """
+    Thread-safe cache that matches queries by embedding similarity.
+
+    Entries are grouped by their search parameters (k, filters, ...) and
+    only ever match queries with the same parameters. A lookup scores the
+    query against every cached embedding of its group with one
+    matrix-vector product, so it stays fast for the few thousand entries
+    this cache holds.
+
+    Example:
+        >>> cache = SemanticQueryCache(threshold=0.95, max_entries=1000)
+        >>> cache.set(("k", 4), query_embedding, results)
+        >>> cache.get(("k", 4), similar_query_embedding)  # -> results
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_entries: int = 1000,
+        ttl_seconds: float = 300,
+        max_scopes: int = 64
+    ):
+        """
+        Args:
+            threshold: Minimum cosine similarity between two queries for
+                       the cached results to be reused (default: 0.95)
+            max_entries: Maximum cached queries per set of search
+                         parameters (the oldest are dropped first)
+            ttl_seconds: How long an entry stays valid (default: 5 minutes)
+            max_scopes: Maximum number of distinct search-parameter sets
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._scopes: TTLCache = TTLCache(maxsize=max_scopes, ttl=ttl_seconds)
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def get(self, scope_key: Hashable, embedding: Sequence[float]) -> Optional[Any]:
+        """
+        Return cached results for the most similar cached query, or None.
+
+        Args:
+            scope_key: The search parameters (must match exactly)
+            embedding: The query embedding
+        """
+        query = self._normalize(embedding)
+
+        with self._lock:
+            scope = self._scopes.get(scope_key)
+            if scope is None or scope.count == 0:
+                self.misses += 1
+                return None
+
+            # Cosine similarity with every cached query (rows are unit length)
+            scores = scope.embeddings[:scope.count] @ query
+            best = int(scores.argmax())
+
+            expired = time.monotonic() - scope.created[best] > self.ttl_seconds
+            if scores[best] < self.threshold or expired:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return scope.results[best]
+
+    def set(self, scope_key: Hashable, embedding: Sequence[float], results: Any) -> None:
+        """
+        Cache the results of a query.
+
+        Args:
+            scope_key: The search parameters
+            embedding: The query embedding
+            results: The search results for this query
+        """
+        if self.max_entries <= 0:
+            return
+
+        query = self._normalize(embedding)
+
+        with self._lock:
+            scope = self._scopes.get(scope_key)
+            if scope is None:
+                scope = _SemanticScope(dimension=query.shape[0], max_entries=self.max_entries)
+                self._scopes[scope_key] = scope
+
+            # Replaces the oldest entry once the scope is full
+            scope.add(query, results, time.monotonic())
+
+    def clear(self) -> None:
+        """Drop every cached entry (call after documents change)."""
+        with self._lock:
+            self._scopes.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the number of cached queries."""
+        with self._lock:
+            return {
+                "size": sum(scope.count for scope in self._scopes.values()),
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses
+            }
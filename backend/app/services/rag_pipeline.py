@@ -2,22 +2,33 @@
 RAG Pipeline updated for OpenRouter instead of OpenAI.
 """
 
+import asyncio
+import functools
 import os
 import json
-from typing import List, Dict, Any, Optional, Tuple
+import logging
+import threading
+from functools import lru_cache
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 from langchain_core.documents import Document
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
 from dotenv import load_dotenv
+import anyio.to_thread
 import httpx
+import openai
+import tiktoken
 
 from app.services.supabase_store import get_vector_store
+from app.services.http_client import get_http_client, get_async_http_client
 from app.models.schemas import ToolCall
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 # AVAILABLE TOOLS (unchanged)
 def fetch_company_policy(policy_name: str) -> str:
@@ -59,6 +70,63 @@ Answer:
 """
 
 
+# TOKEN COUNTING
+# cl100k_base is not the exact tokenizer of every model we can be configured
+# with (gpt-4.1-mini uses o200k_base), so tokens_used is an approximation of
+# what the provider bills. The encoding is loaded on the first count instead
+# of at import: tiktoken downloads it the first time, and the app shouldn't
+# fail to start without network access. If loading fails we fall back to the
+# usual ~4 characters per token estimate.
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """Load the tiktoken encoding once; returns None if it can't be loaded."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    _encoding = tiktoken.get_encoding("cl100k_base")
+                except Exception as e:
+                    logger.warning(f"Couldn't load the tiktoken encoding, estimating token counts: {e}")
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(*texts: str) -> int:
+    """
+    Count (approximately) the tokens in one or more texts.
+
+    encode_ordinary treats special-token text (e.g. "<|endoftext|>") in a
+    question or document as plain text instead of raising an error.
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        return sum(len(text) // 4 for text in texts)
+    return sum(len(encoding.encode_ordinary(text)) for text in texts)
+
+
+# CONTEXT FORMATTING CACHE
+# Context strings are cached by their inputs, so repeated retrievals
+# (the same question, dashboards, evaluation loops) skip rebuilding them.
+CONTEXT_CACHE_SIZE = 512
+
+
+@lru_cache(maxsize=CONTEXT_CACHE_SIZE)
+def _format_context_cached(entries: Tuple[Tuple[str, Any, Any, float], ...]) -> str:
+    """
+    Build the context string from hashable (content, source, page, score) tuples.
+    """
+    return "\n".join(
+        f"--- Document {i} (Source: {src}, Page: {page}, Score: {score:.2f}) ---\n"
+        f"{content}\n"
+        for i, (content, src, page, score) in enumerate(entries, 1)
+    )
+
+
 # ============================================================================
 # RAG PIPELINE UPDATED FOR OPENROUTER
 # ============================================================================
@@ -68,22 +136,43 @@ class RAGPipeline:
     def __init__(
         self,
         model_name: str = "openai/gpt-4.1-mini",
-        temperature: float = 0.0
+        temperature: float = 0.0,
+        http_client: Optional[httpx.Client] = None,
+        async_http_client: Optional[httpx.AsyncClient] = None
     ):
         """
         Initialize the RAG pipeline using OpenRouter.
+
+        Args:
+            model_name: OpenRouter model identifier
+            temperature: Sampling temperature for the LLM
+            http_client: HTTP client for LLM requests
+                         (default: the shared client from get_http_client())
+            async_http_client: HTTP client for async / streaming LLM requests
+                               (default: the shared get_async_http_client())
         """
 
         api_key = os.getenv("OPENROUTER_API_KEY")
         if not api_key:
             raise ValueError("OPENROUTER_API_KEY missing in env")
 
+        base_url = "https://openrouter.ai/api/v1"
+
         # 👇 Key change: ChatOpenAI routed through OpenRouter
         self.llm = ChatOpenAI(
             model=model_name,
             temperature=temperature,
             api_key=api_key,
-            base_url="https://openrouter.ai/api/v1"
+            base_url=base_url,
+            # Reuse pooled keep-alive connections instead of a private client
+            http_client=http_client or get_http_client(),
+            # ChatOpenAI would hand the sync client to its async API client
+            # too, so async calls (ainvoke / astream) get their own
+            async_client=openai.AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=async_http_client or get_async_http_client()
+            ).chat.completions
         )
 
         self.vector_store = get_vector_store()
@@ -93,23 +182,36 @@ class RAGPipeline:
     # RETRIEVAL WITH DOCUMENT FILTERING
     # ----------------------------------------------------------------------
 
-    def retrieve_documents(self, question: str, k: int = 4, document_filter: dict = None):
+    def retrieve_documents(
+        self,
+        question: str,
+        k: int = 4,
+        filter_document_id: Optional[str] = None,
+        filter_source: Optional[str] = None
+    ):
         """
         Retrieve relevant documents with optional filtering.
 
         Args:
             question: User's question
             k: Number of results to return
-            document_filter: Optional metadata filter (e.g., {"document_id": "uuid"})
-                           This prevents cross-document contamination!
+            filter_document_id: Only retrieve chunks of this document ID
+            filter_source: Only retrieve chunks of this filename,
+                           or LATEST_DOCUMENT for the most recent upload.
+            These filters prevent cross-document contamination!
 
         Returns:
             List of (Document, score) tuples
         """
+        # Repeated questions reuse their cached query embedding
+        query_embedding = self.vector_store.embedding_service.embed_text_cached(question)
+
         return self.vector_store.search(
             query=question,
             k=k,
-            filter_dict=document_filter  # CRITICAL FIX: Add filtering!
+            query_embedding=query_embedding,
+            document_id=filter_document_id,  # CRITICAL FIX: Add filtering!
+            source=filter_source
         )
 
     # ----------------------------------------------------------------------
@@ -117,17 +219,18 @@ class RAGPipeline:
     # ----------------------------------------------------------------------
 
     def format_context(self, documents):
-        parts = []
-        for i, (doc, score) in enumerate(documents, 1):
-            src = doc.metadata.get("source", "Unknown")
-            page = doc.metadata.get("page", "N/A")
-
-            parts.append(
-                f"--- Document {i} (Source: {src}, Page: {page}, Score: {score:.2f}) ---\n"
-                f"{doc.page_content}\n"
+        # Only these fields end up in the context, so they form the cache key
+        # (a tuple, not a set: document order matters in the prompt)
+        entries = tuple(
+            (
+                doc.page_content,
+                doc.metadata.get("source", "Unknown"),
+                doc.metadata.get("page", "N/A"),
+                score
             )
-
-        return "\n".join(parts)
+            for doc, score in documents
+        )
+        return _format_context_cached(entries)
 
     # ----------------------------------------------------------------------
     # TOOL CALLING
@@ -143,6 +246,36 @@ class RAGPipeline:
         except Exception as e:
             return f"Error calling tool: {e}"
 
+    def match_policy(self, question: str) -> Optional[str]:
+        """
+        Return the policy a question asks about, or None.
+
+        Tool triggering only looks at the question text, so it can be
+        decided before retrieval runs.
+        """
+        question_lower = question.lower()
+        if "policy" not in question_lower:
+            return None
+
+        for p in ["refund", "vacation", "remote_work", "expenses"]:
+            if p in question_lower:
+                return p
+        return None
+
+    @staticmethod
+    def tool_result_to_doc(policy: str, result: str) -> Tuple[ToolCall, Tuple[Document, float]]:
+        """Wrap a policy tool result as a ToolCall and a synthetic context doc."""
+        tool_call = ToolCall(
+            tool_name="fetch_company_policy",
+            arguments={"policy_name": policy},
+            result=result
+        )
+        synthetic = Document(
+            page_content=result,
+            metadata={"source": "tool_call"}
+        )
+        return tool_call, (synthetic, 1.0)
+
     # ----------------------------------------------------------------------
     # MAIN GENERATION METHOD
     # ----------------------------------------------------------------------
@@ -152,7 +285,8 @@ class RAGPipeline:
         question: str,
         max_results: int = 4,
         use_tool_calling: bool = False,
-        document_filter: dict = None
+        filter_document_id: Optional[str] = None,
+        filter_source: Optional[str] = None
     ):
         """
         Generate answer with optional document filtering.
@@ -161,36 +295,29 @@ class RAGPipeline:
             question: User's question
             max_results: Number of chunks to retrieve
             use_tool_calling: Enable function calling
-            document_filter: Filter by document metadata (e.g., {"document_id": "uuid"})
-                           IMPORTANT: Use this to query specific documents only!
+            filter_document_id: Only use chunks of this document ID
+            filter_source: Only use chunks of this filename (or LATEST_DOCUMENT)
+            IMPORTANT: Use these to query specific documents only!
         """
         # Retrieve docs with filtering to prevent cross-document contamination
         retrieved_docs = self.retrieve_documents(
             question,
             k=max_results,
-            document_filter=document_filter
+            filter_document_id=filter_document_id,
+            filter_source=filter_source
         )
 
         tool_calls_made = []
 
         # Tool triggering
-        if use_tool_calling and "policy" in question.lower():
-            for p in ["refund", "vacation", "remote_work", "expenses"]:
-                if p in question.lower():
-                    res = self.call_tool("fetch_company_policy", {"policy_name": p})
-                    tool_calls_made.append(ToolCall(
-                        tool_name="fetch_company_policy",
-                        arguments={"policy_name": p},
-                        result=res
-                    ))
-
-                    # Add tool result to docs
-                    synthetic = Document(
-                        page_content=res,
-                        metadata={"source": "tool_call"}
-                    )
-                    retrieved_docs.append((synthetic, 1.0))
-                    break
+        policy = self.match_policy(question) if use_tool_calling else None
+        if policy:
+            res = self.call_tool("fetch_company_policy", {"policy_name": policy})
+            tool_call, synthetic = self.tool_result_to_doc(policy, res)
+            tool_calls_made.append(tool_call)
+
+            # Add tool result to docs
+            retrieved_docs.append(synthetic)
 
         context = self.format_context(retrieved_docs)
 
@@ -203,7 +330,99 @@ class RAGPipeline:
         response = self.llm.invoke(prompt_text)
         answer = response.content
 
-        tokens_used = (len(prompt_text) + len(answer)) // 4
+        tokens_used = count_tokens(prompt_text, answer)
+
+        return {
+            "answer": answer,
+            "retrieved_docs": retrieved_docs,
+            "tool_calls": tool_calls_made or None,
+            "tokens_used": tokens_used
+        }
+
+    async def aretrieve_with_tools(
+        self,
+        question: str,
+        max_results: int = 4,
+        use_tool_calling: bool = False,
+        filter_document_id: Optional[str] = None,
+        filter_source: Optional[str] = None
+    ) -> Tuple[List[Tuple[Document, float]], List[ToolCall]]:
+        """
+        Retrieve documents and run the policy tool at the same time.
+
+        Whether a tool is needed depends only on the question, so the
+        tool call doesn't have to wait for the vector search to finish:
+        both run concurrently in the threadpool and the total wait is the
+        slower of the two instead of their sum.
+
+        Returns:
+            (retrieved_docs including any tool result, tool_calls_made)
+        """
+        retrieval = anyio.to_thread.run_sync(
+            functools.partial(
+                self.retrieve_documents,
+                question,
+                k=max_results,
+                filter_document_id=filter_document_id,
+                filter_source=filter_source
+            )
+        )
+
+        tool_calls_made = []
+
+        policy = self.match_policy(question) if use_tool_calling else None
+        if policy:
+            retrieved_docs, res = await asyncio.gather(
+                retrieval,
+                anyio.to_thread.run_sync(
+                    self.call_tool, "fetch_company_policy", {"policy_name": policy}
+                )
+            )
+
+            # Merge the tool result into the retrieved docs
+            tool_call, synthetic = self.tool_result_to_doc(policy, res)
+            tool_calls_made.append(tool_call)
+            retrieved_docs.append(synthetic)
+        else:
+            retrieved_docs = await retrieval
+
+        return retrieved_docs, tool_calls_made
+
+    async def agenerate_answer(
+        self,
+        question: str,
+        max_results: int = 4,
+        use_tool_calling: bool = False,
+        filter_document_id: Optional[str] = None,
+        filter_source: Optional[str] = None
+    ):
+        """
+        Async version of generate_answer.
+
+        Retrieval and the tool call run concurrently (see
+        aretrieve_with_tools), then the LLM is called on the event loop.
+
+        Takes the same arguments and returns the same dict as generate_answer.
+        """
+        retrieved_docs, tool_calls_made = await self.aretrieve_with_tools(
+            question,
+            max_results=max_results,
+            use_tool_calling=use_tool_calling,
+            filter_document_id=filter_document_id,
+            filter_source=filter_source
+        )
+
+        context = self.format_context(retrieved_docs)
+
+        prompt_text = self.prompt.format(
+            context=context,
+            question=question
+        )
+
+        response = await self.llm.ainvoke(prompt_text)
+        answer = response.content
+
+        tokens_used = count_tokens(prompt_text, answer)
 
         return {
             "answer": answer,
@@ -212,6 +431,46 @@ class RAGPipeline:
             "tokens_used": tokens_used
         }
 
+    async def astream_answer(
+        self,
+        question: str,
+        max_results: int = 4,
+        use_tool_calling: bool = False,
+        filter_document_id: Optional[str] = None,
+        filter_source: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Generate an answer and yield it piece by piece as the LLM produces it.
+
+        Retrieval works exactly like agenerate_answer; only the LLM call
+        differs. Instead of waiting for the whole completion, each token
+        is yielded as soon as it arrives, so the user starts reading after
+        the first token instead of after the last one.
+
+        Takes the same arguments as generate_answer.
+
+        Yields:
+            Pieces of the answer text, in order
+        """
+        retrieved_docs, _ = await self.aretrieve_with_tools(
+            question,
+            max_results=max_results,
+            use_tool_calling=use_tool_calling,
+            filter_document_id=filter_document_id,
+            filter_source=filter_source
+        )
+
+        context = self.format_context(retrieved_docs)
+
+        prompt_text = self.prompt.format(
+            context=context,
+            question=question
+        )
+
+        async for chunk in self.llm.astream(prompt_text):
+            if chunk.content:
+                yield chunk.content
+
     # ----------------------------------------------------------------------
     # LCEL VERSION
     # ----------------------------------------------------------------------
@@ -232,10 +491,14 @@ class RAGPipeline:
 
 # Global instance
 _rag_pipeline = None
+_rag_pipeline_lock = threading.Lock()
 
 
 def get_rag_pipeline():
     global _rag_pipeline
     if _rag_pipeline is None:
-        _rag_pipeline = RAGPipeline()
+        # Double-checked locking, so concurrent first calls create one pipeline
+        with _rag_pipeline_lock:
+            if _rag_pipeline is None:
+                _rag_pipeline = RAGPipeline()
     return _rag_pipeline
\ No newline at end of file
@@ -9,18 +9,60 @@ A vector store is a specialized database that can:
 
 We use Supabase with pgvector extension, which adds vector capabilities to PostgreSQL.
 """
+import asyncio
+import functools
+import hashlib
+import logging
 import os
-from typing import List, Tuple, Optional
+import threading
+import uuid
+from typing import Dict, List, Tuple, Optional, Sequence, Set
+
+import anyio.to_thread
+import httpx
+import orjson
 from langchain_core.documents import Document
-from langchain_community.vectorstores import SupabaseVectorStore
-from supabase.client import Client, create_client
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+from postgrest.utils import SyncClient
+from supabase.client import Client, ClientOptions, create_client
 from dotenv import load_dotenv
 
 from app.services.embeddings import get_embedding_service
+from app.services.query_cache import QueryCache, SemanticQueryCache
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Sentinel source: restrict a search to the most recently uploaded document.
+# Resolved inside the similarity-search SQL (see latest_document_search.sql),
+# so it costs no extra round-trip.
+LATEST_DOCUMENT = "__latest__"
+
+# Supabase REST (PostgREST) connection pool, per worker process
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "30"))  # seconds
+SUPABASE_MAX_CONNECTIONS = 64
+SUPABASE_MAX_KEEPALIVE_CONNECTIONS = 32
+
+# Metadata filters the SQL search functions can apply before the vector
+# search (see scoped_document_search.sql)
+SCOPED_FILTER_KEYS = frozenset({"document_id", "source"})
+
+# Search result cache (see query_cache.py)
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "2000"))
+QUERY_CACHE_TTL = int(os.getenv("QUERY_CACHE_TTL", "300"))  # seconds
+
+# Reuse results for rephrased queries whose embeddings are this similar
+# (set SEMANTIC_CACHE_SIZE=0 to disable)
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "1000"))
+
+# Search unfiltered queries through the binary quantized index
+# (requires binary_quantization.sql to have been run)
+BINARY_QUANTIZED_SEARCH = os.getenv("BINARY_QUANTIZED_SEARCH", "false").lower() == "true"
+
 
 class VectorStoreService:
     """
@@ -56,21 +98,59 @@ class VectorStoreService:
             )
 
         # Create Supabase client
-        self.supabase_client: Client = create_client(supabase_url, supabase_key)
+        self.supabase_client: Client = create_client(
+            supabase_url,
+            supabase_key,
+            options=ClientOptions(postgrest_client_timeout=SUPABASE_TIMEOUT)
+        )
+        self._configure_rest_session()
         self.table_name = table_name
 
         # Get embedding service
         self.embedding_service = get_embedding_service()
 
-        # Initialize LangChain's SupabaseVectorStore
-        # This will handle all vector operations for us
-        self.vector_store = SupabaseVectorStore(
-            client=self.supabase_client,
-            embedding=self.embedding_service.embeddings,
-            table_name=self.table_name,
-            query_name=f"match_{self.table_name}"  # Name of the similarity search function
+        # Recent search results, invalidated whenever documents change
+        self.query_cache = QueryCache(max_size=QUERY_CACHE_SIZE, ttl_seconds=QUERY_CACHE_TTL)
+        self.semantic_cache = SemanticQueryCache(
+            threshold=SEMANTIC_CACHE_THRESHOLD,
+            max_entries=SEMANTIC_CACHE_SIZE,
+            ttl_seconds=QUERY_CACHE_TTL
         )
 
+    def _configure_rest_session(self) -> None:
+        """
+        Size the connection pool used for all table and RPC calls.
+
+        Every .table(...) and .rpc(...) call goes through one persistent
+        HTTP/2 session owned by the client's PostgREST client, so TLS
+        connections are kept alive and reused.
+        supabase-py doesn't accept a custom httpx client, so we swap that
+        session for one with the same settings and a pool sized for
+        concurrent uploads and searches.
+        """
+        postgrest = self.supabase_client.postgrest
+        default_session = postgrest.session
+        postgrest.session = SyncClient(
+            base_url=default_session.base_url,
+            headers=default_session.headers,
+            timeout=default_session.timeout,
+            follow_redirects=True,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=SUPABASE_MAX_CONNECTIONS,
+                max_keepalive_connections=SUPABASE_MAX_KEEPALIVE_CONNECTIONS
+            )
+        )
+        default_session.close()
+
+    def close(self) -> None:
+        """
+        Close the pooled Supabase connections.
+
+        Called on application shutdown.
+        """
+        self.supabase_client.postgrest.session.close()
+
     def store_documents(
         self,
         documents: List[Document],
@@ -81,12 +161,15 @@ class VectorStoreService:
 
         This method:
         1. Takes a list of Document objects
-        2. Generates embeddings for each document
-        3. Stores both the text and embeddings in Supabase
+        2. Generates embeddings for all documents as one NumPy array
+           (reusing stored embeddings of identical chunks, see
+           embedding_reuse.sql)
+        3. Stores both the text and embeddings in Supabase,
+           batch_size rows per INSERT request
 
         Args:
             documents: List of Document objects to store
-            batch_size: Number of documents to process at once (for large uploads)
+            batch_size: Number of rows sent per INSERT request (for large uploads)
 
         Returns:
             List of document IDs that were created
@@ -98,114 +181,528 @@ class VectorStoreService:
             >>> ids = store.store_documents(docs)
             >>> print(f"Stored {len(ids)} documents")
         """
-        # Use LangChain's add_documents method
-        # This automatically generates embeddings and stores them
-        document_ids = self.vector_store.add_documents(documents)
+        # Reuse the embeddings of chunks we've stored before (e.g. a file
+        # uploaded again) and embed each new text only once
+        hashes = [self.content_hash(doc.page_content) for doc in documents]
+        vectors_by_hash = self._find_embeddings_by_hash(set(hashes))
+
+        new_texts = {}
+        for content_hash, doc in zip(hashes, documents):
+            if content_hash not in vectors_by_hash:
+                new_texts.setdefault(content_hash, doc.page_content)
+
+        if new_texts:
+            embeddings = self.embedding_service.embed_documents(list(new_texts.values()))
+
+            # Serialize each embedding straight from the array to pgvector's
+            # text format ("[0.1,0.2,...]"); orjson reads the NumPy buffer
+            # directly, so no Python float objects are created along the way
+            for content_hash, embedding in zip(new_texts, embeddings):
+                vectors_by_hash[content_hash] = orjson.dumps(
+                    embedding, option=orjson.OPT_SERIALIZE_NUMPY
+                ).decode()
+
+        vectors = [vectors_by_hash[content_hash] for content_hash in hashes]
+
+        # IDs are generated here, so Supabase doesn't have to send the
+        # inserted rows (embeddings included) back just to tell us them
+        ids = [str(uuid.uuid4()) for _ in documents]
+
+        rows = [
+            {
+                "id": doc_id,
+                "content": doc.page_content,
+                "metadata": doc.metadata,
+                "embedding": vector
+            }
+            for doc_id, doc, vector in zip(ids, documents, vectors)
+        ]
+
+        # Plain INSERTs in a few large requests
+        # (LangChain's add_vectors does an UPSERT and returns every row)
+        table = self.supabase_client.table(self.table_name)
+        for i in range(0, len(rows), batch_size):
+            table.insert(
+                rows[i:i + batch_size],
+                returning=ReturnMethod.minimal
+            ).execute()
+
+        # Cached searches don't know about the new chunks
+        self.clear_search_cache()
+
+        return ids
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """
+        Hash a chunk's text the same way as the content_hash column.
+
+        (see embedding_reuse.sql: hex SHA-256 of the UTF-8 text)
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _find_embeddings_by_hash(self, hashes: Set[str]) -> Dict[str, str]:
+        """
+        Look up stored embeddings for chunks with these content hashes.
+
+        Args:
+            hashes: Content hashes of the chunks about to be stored
+
+        Returns:
+            Dictionary of content hash -> embedding, in pgvector's text
+            format (empty if embedding_reuse.sql hasn't been run)
+        """
+        try:
+            response = self.supabase_client.rpc(
+                "find_embeddings_by_hash",
+                {"hashes": list(hashes)}
+            ).execute()
+        except APIError as e:
+            # Not an error: every chunk just gets embedded
+            logger.debug("Embedding lookup unavailable (%s)", e.message)
+            return {}
+
+        return {row["content_hash"]: row["embedding"] for row in response.data}
+
+    async def astore_documents(
+        self,
+        documents: List[Document],
+        batch_size: int = 64,
+        max_concurrency: int = 5
+    ) -> List[str]:
+        """
+        Store documents in concurrent batches, without blocking the event loop.
+
+        Instead of one big store_documents call (embed everything, then
+        insert everything), the documents are split into batches that run
+        in parallel in the threadpool. While one batch is waiting on
+        Supabase, another can be embedding, so the two steps overlap. The
+        semaphore caps how many batches run at once, to stay within
+        Supabase rate limits (and the connection pool).
+
+        Args:
+            documents: List of Document objects to store
+            batch_size: Number of documents embedded and inserted together
+            max_concurrency: Maximum number of batches in flight at once
+
+        Returns:
+            List of created document IDs, in the same order as the documents
+
+        Example:
+            >>> ids = await store.astore_documents(docs)
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def store_batch(batch: List[Document]) -> List[str]:
+            async with semaphore:
+                return await anyio.to_thread.run_sync(self.store_documents, batch)
+
+        batches = [
+            documents[i:i + batch_size]
+            for i in range(0, len(documents), batch_size)
+        ]
+        results = await asyncio.gather(*(store_batch(batch) for batch in batches))
+
+        return [doc_id for batch_ids in results for doc_id in batch_ids]
+
+    async def asearch(self, query: str, **kwargs) -> List[Tuple[Document, float]]:
+        """
+        Async version of search (same arguments), run in the threadpool.
 
-        return document_ids
+        Lets async callers run several searches (or a search and other
+        I/O) concurrently with asyncio.gather.
+        """
+        return await anyio.to_thread.run_sync(functools.partial(self.search, query, **kwargs))
+
+    async def asearch_many(
+        self,
+        queries: List[str],
+        **kwargs
+    ) -> List[List[Tuple[Document, float]]]:
+        """Async version of search_many (same arguments), run in the threadpool."""
+        return await anyio.to_thread.run_sync(
+            functools.partial(self.search_many, queries, **kwargs)
+        )
 
     def search(
         self,
         query: str,
         k: int = 4,
-        filter_dict: Optional[dict] = None
+        filter_dict: Optional[dict] = None,
+        document_id: Optional[str] = None,
+        source: Optional[str] = None,
+        query_embedding: Optional[Sequence[float]] = None
     ) -> List[Tuple[Document, float]]:
         """
-        Search for documents similar to the query with POST-FILTERING.
-
-        IMPORTANT: LangChain's JSONB filter doesn't work reliably with Supabase,
-        so we retrieve MORE results and filter in Python.
+        Search for documents similar to the query.
 
         This performs semantic similarity search:
         1. Convert query to embedding
-        2. Find documents with similar embeddings
-        3. Filter by metadata in Python (more reliable!)
-        4. Return the top K most similar documents
+        2. Find documents with similar embeddings (filtered by metadata in SQL)
+        3. Return the top K most similar documents
+
+        Filtering by document_id / source (what /ask/ does) runs via
+        match_documents_scoped. This also applies to a filter_dict that
+        only uses those two keys. Other filters run via match_documents
+        (`metadata @> filter`, see metadata_filter_index.sql).
 
         Args:
             query: The search query (user's question)
             k: Number of results to return (default: 4)
-            filter_dict: Optional metadata filter (e.g., {"source": "specific.pdf"})
+            filter_dict: Optional metadata filter (e.g., {"page": 3})
+            document_id: Only search chunks of this document (filtered in SQL)
+            source: Only search chunks of this filename (filtered in SQL),
+                    or LATEST_DOCUMENT to search only the latest upload
+            query_embedding: Precomputed embedding of the query
+                             (skips embedding the query again)
 
         Returns:
             List of tuples (Document, similarity_score)
             similarity_score ranges from 0 to 1, where 1 is most similar
         """
-        # DEBUG LOGGING
-        print(f"\n{'='*60}")
-        print(f"🔍 VECTOR SEARCH CALLED")
-        print(f"📝 Query: {query[:100]}...")
-        print(f"🎯 K requested: {k}")
-        print(f"🔧 Filter: {filter_dict}")
-
-        # CRITICAL FIX: Retrieve MORE results to ensure we get matches
-        # Then filter in Python since LangChain's JSONB filter is unreliable
-        retrieve_k = k * 10 if filter_dict else k  # Get 10x more if filtering
-        print(f"📊 Retrieving {retrieve_k} results (will filter to {k})")
-        print(f"{'='*60}\n")
-
-        # Get results WITHOUT LangChain filter (it doesn't work!)
-        results = self.vector_store.similarity_search_with_relevance_scores(
-            query=query,
-            k=retrieve_k,
-            filter=None  # DON'T use LangChain's filter - it fails!
+        # Serve repeated searches from the query cache
+        # (document_id-scoped searches only, see _is_cacheable;
+        # filter_dict is serialized with sorted keys to make it hashable)
+        cacheable = self._is_cacheable(document_id, source, filter_dict)
+        cache_key = self.query_cache.make_key(
+            query,
+            k,
+            document_id,
+            source,
+            orjson.dumps(filter_dict, option=orjson.OPT_SORT_KEYS) if filter_dict else None
+        )
+        cached_results = self.query_cache.get(cache_key) if cacheable else None
+        if cached_results is not None:
+            # Callers may append to the list (e.g. tool results), so hand out a copy
+            return list(cached_results)
+
+        # Otherwise, look for an earlier query that means the same thing
+        # (same search parameters, nearly identical embedding)
+        if query_embedding is None:
+            query_embedding = self.embedding_service.embed_text(query)
+
+        scope_key = self.query_cache.make_scope_key(cache_key)
+        similar_results = self.semantic_cache.get(scope_key, query_embedding) if cacheable else None
+        if similar_results is not None:
+            self.query_cache.set(cache_key, similar_results)
+            return list(similar_results)
+
+        results = self._search(
+            query,
+            k=k,
+            filter_dict=filter_dict,
+            document_id=document_id,
+            source=source,
+            query_embedding=query_embedding
         )
 
-        print(f"📥 Raw results before filtering: {len(results)}")
-
-        # DEBUG: Show what metadata we got
-        if results and filter_dict:
-            print(f"\n🔬 INSPECTING METADATA (first 3 results):")
-            for i, (doc, score) in enumerate(results[:3], 1):
-                print(f"  Result {i}:")
-                print(f"    Score: {score:.3f}")
-                print(f"    Metadata keys: {list(doc.metadata.keys())}")
-                print(f"    source: {doc.metadata.get('source', 'MISSING!')}")
-                print(f"    document_id: {doc.metadata.get('document_id', 'MISSING!')[:20]}...")
-                print(f"    Filtering for: {filter_dict}")
-                print()
-
-        # POST-FILTER in Python (much more reliable!)
-        if filter_dict:
-            filtered_results = []
-            for doc, score in results:
-                # Check if document matches ALL filter criteria
-                matches = True
-                for key, value in filter_dict.items():
-                    doc_value = doc.metadata.get(key)
-                    if doc_value != value:
-                        print(f"  ❌ MISMATCH: {key}='{doc_value}' != '{value}'")
-                        matches = False
-                        break
-
-                if matches:
-                    print(f"  ✅ MATCH: Adding document with {key}='{value}'")
-                    filtered_results.append((doc, score))
-
-                # Stop once we have enough matching results
-                if len(filtered_results) >= k:
-                    break
-
-            results = filtered_results
-            print(f"\n✅ After Python filtering: {len(results)} matches")
-        else:
-            results = results[:k]
-
-        # DEBUG: Show what was retrieved
-        print(f"\n{'='*60}")
-        print(f"✅ FINAL SEARCH RESULTS ({len(results)} documents)")
-        for i, (doc, score) in enumerate(results, 1):
-            source = doc.metadata.get('source', 'Unknown')
-            doc_id = doc.metadata.get('document_id', 'Unknown')[:8]
-            print(f"  {i}. {source} (doc_id: {doc_id}..., score: {score:.3f})")
-        print(f"{'='*60}\n")
-
+        if cacheable:
+            self.query_cache.set(cache_key, tuple(results))
+            self.semantic_cache.set(scope_key, query_embedding, tuple(results))
         return results
 
+    @staticmethod
+    def _is_cacheable(
+        document_id: Optional[str],
+        source: Optional[str],
+        filter_dict: Optional[dict]
+    ) -> bool:
+        """
+        Check whether a search's results can be cached (by either cache).
+
+        Only searches scoped to a document_id are cached. Each worker process
+        has its own caches, and an upload or delete only clears the caches of
+        the worker that handled it. A document_id's chunks never change after
+        upload, but a search over all documents, a filename or LATEST_DOCUMENT
+        can change with any upload, and the other workers would keep
+        returning the old results. After a delete, other workers can still
+        return the deleted document's chunks until their entries expire
+        (QUERY_CACHE_TTL).
+        """
+        filter_dict = filter_dict or {}
+        if LATEST_DOCUMENT in (source, filter_dict.get("source")):
+            return False
+        return document_id is not None or filter_dict.get("document_id") is not None
+
+    def clear_search_cache(self) -> None:
+        """
+        Drop all cached search results.
+
+        Called whenever documents are added or removed.
+        """
+        self.query_cache.invalidate()
+        self.semantic_cache.clear()
+
+    def _search(
+        self,
+        query: str,
+        k: int = 4,
+        filter_dict: Optional[dict] = None,
+        document_id: Optional[str] = None,
+        source: Optional[str] = None,
+        query_embedding: Optional[Sequence[float]] = None
+    ) -> List[Tuple[Document, float]]:
+        """Run a search without the query cache (see search for the arguments)."""
+        if query_embedding is None:
+            query_embedding = self.embedding_service.embed_text(query)
+
+        # Document filters are applied in SQL *before* the similarity search,
+        # instead of over-fetching and filtering the results in Python
+        if filter_dict and filter_dict.keys() <= SCOPED_FILTER_KEYS:
+            document_id = document_id or filter_dict.get("document_id")
+            source = source or filter_dict.get("source")
+            filter_dict = None
+
+        if source == LATEST_DOCUMENT:
+            return self.search_latest_document(query, k=k, query_embedding=query_embedding)
+
+        if document_id or source:
+            return self.search_scoped(
+                query,
+                k=k,
+                document_id=document_id,
+                source=source,
+                query_embedding=query_embedding
+            )
+
+        if BINARY_QUANTIZED_SEARCH and not filter_dict:
+            return self.search_binary(query, k=k, query_embedding=query_embedding)
+
+        # Everything else (with or without a metadata filter) runs via
+        # match_documents, which filters in SQL and returns exactly k rows
+        return self.search_filtered(
+            query,
+            k=k,
+            filter_dict=filter_dict,
+            query_embedding=query_embedding
+        )
+
+    def search_filtered(
+        self,
+        query: str,
+        k: int = 4,
+        filter_dict: Optional[dict] = None,
+        query_embedding: Optional[Sequence[float]] = None
+    ) -> List[Tuple[Document, float]]:
+        """
+        Search chunks whose metadata contains filter_dict, filtered in SQL.
+
+        Calls match_documents with the filter as a jsonb parameter, so
+        Postgres applies `metadata @> filter` (indexed by the GIN index in
+        metadata_filter_index.sql) and returns exactly k rows - no
+        over-fetching and no filtering in Python.
+
+        Args:
+            query: The search query (user's question)
+            k: Number of results to return (default: 4)
+            filter_dict: Metadata key/values every result must have
+            query_embedding: Precomputed embedding of the query (optional)
+
+        Returns:
+            List of tuples (Document, similarity_score)
+
+        Raises:
+            APIError: If the match_documents RPC fails
+        """
+        if query_embedding is None:
+            query_embedding = self.embedding_service.embed_text(query)
+
+        response = self.supabase_client.rpc(
+            "match_documents",
+            {
+                "query_embedding": query_embedding,
+                "match_count": k,
+                "filter": filter_dict or {}
+            }
+        ).execute()
+
+        return self._rows_to_results(response.data)
+
+    def search_many(
+        self,
+        queries: List[str],
+        k: int = 4,
+        filter_dict: Optional[dict] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Search for several queries at once.
+
+        All queries are embedded in one batch, and match_documents_many
+        (see multi_query_search.sql) searches for all of them in a single
+        SQL call instead of one round-trip per query.
+
+        Args:
+            queries: The search queries (e.g. sub-questions of one turn)
+            k: Number of results per query (default: 4)
+            filter_dict: Optional metadata filter applied to every query
+
+        Returns:
+            One list of (Document, similarity_score) tuples per query,
+            in the same order as queries
+
+        Example:
+            >>> store = VectorStoreService()
+            >>> results = store.search_many(["refund policy", "shipping times"])
+            >>> len(results)
+            2
+        """
+        if not queries:
+            return []
+
+        embeddings = self.embedding_service.embed_documents(queries)
+
+        response = self.supabase_client.rpc(
+            "match_documents_many",
+            {
+                # vector[] elements in pgvector's text format ("[0.1,0.2,...]")
+                "query_embeddings": [
+                    orjson.dumps(embedding, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+                    for embedding in embeddings
+                ],
+                "match_count": k,
+                "filter": filter_dict or {}
+            }
+        ).execute()
+
+        # Group the rows by query (query_index is 1-based)
+        rows_by_query: List[List[dict]] = [[] for _ in queries]
+        for row in response.data:
+            rows_by_query[row["query_index"] - 1].append(row)
+
+        return [self._rows_to_results(rows) for rows in rows_by_query]
+
+    def search_latest_document(
+        self,
+        query: str,
+        k: int = 4,
+        query_embedding: Optional[Sequence[float]] = None
+    ) -> List[Tuple[Document, float]]:
+        """
+        Search only the most recently uploaded document.
+
+        The latest document is resolved by the match_latest_document SQL
+        function in the same query as the similarity search, instead of
+        looking it up with a separate request first.
+
+        Args:
+            query: The search query (user's question)
+            k: Number of results to return (default: 4)
+            query_embedding: Precomputed embedding of the query (optional)
+
+        Returns:
+            List of tuples (Document, similarity_score)
+        """
+        if query_embedding is None:
+            query_embedding = self.embedding_service.embed_text(query)
+
+        response = self.supabase_client.rpc(
+            "match_latest_document",
+            {"query_embedding": query_embedding, "match_count": k}
+        ).execute()
+
+        return self._rows_to_results(response.data)
+
+    def search_scoped(
+        self,
+        query: str,
+        k: int = 4,
+        document_id: Optional[str] = None,
+        source: Optional[str] = None,
+        query_embedding: Optional[Sequence[float]] = None
+    ) -> List[Tuple[Document, float]]:
+        """
+        Search within one document, identified by ID and/or filename.
+
+        Both filters are passed as typed parameters to the
+        match_documents_scoped SQL function (see scoped_document_search.sql),
+        so the filtering happens in Postgres with a cached query plan.
+
+        Args:
+            query: The search query (user's question)
+            k: Number of results to return (default: 4)
+            document_id: Only search chunks with this document_id
+            source: Only search chunks with this source filename
+            query_embedding: Precomputed embedding of the query (optional)
+
+        Returns:
+            List of tuples (Document, similarity_score)
+        """
+        if query_embedding is None:
+            query_embedding = self.embedding_service.embed_text(query)
+
+        response = self.supabase_client.rpc(
+            "match_documents_scoped",
+            {
+                "query_embedding": query_embedding,
+                "match_count": k,
+                "p_document_id": document_id,
+                "p_source": source
+            }
+        ).execute()
+
+        return self._rows_to_results(response.data)
+
+    def search_binary(
+        self,
+        query: str,
+        k: int = 4,
+        rerank_factor: int = 4,
+        query_embedding: Optional[Sequence[float]] = None
+    ) -> List[Tuple[Document, float]]:
+        """
+        Search using the binary quantized embeddings, then re-rank.
+
+        The match_documents_binary SQL function (see binary_quantization.sql)
+        finds k * rerank_factor candidates by Hamming distance over 1-bit
+        embeddings (32x smaller than float32), then orders those candidates
+        by exact cosine similarity and returns the top k.
+
+        Args:
+            query: The search query (user's question)
+            k: Number of results to return (default: 4)
+            rerank_factor: How many candidates per result to re-rank (default: 4)
+            query_embedding: Precomputed embedding of the query (optional)
+
+        Returns:
+            List of tuples (Document, similarity_score)
+        """
+        if query_embedding is None:
+            query_embedding = self.embedding_service.embed_text(query)
+
+        response = self.supabase_client.rpc(
+            "match_documents_binary",
+            {
+                "query_embedding": query_embedding,
+                "match_count": k,
+                "rerank_factor": rerank_factor
+            }
+        ).execute()
+
+        return self._rows_to_results(response.data)
+
+    @staticmethod
+    def _rows_to_results(rows: List[dict]) -> List[Tuple[Document, float]]:
+        """
+        Convert match_* RPC rows into (Document, similarity_score) tuples.
+
+        Rows are re-sorted by similarity: with iterative index scans in
+        relaxed_order mode (see iterative_scan.sql) Postgres may return
+        them slightly out of order. Sorting k rows costs next to nothing.
+        """
+        rows = sorted(rows, key=lambda row: row["similarity"], reverse=True)
+        return [
+            (
+                Document(page_content=row["content"], metadata=row.get("metadata") or {}),
+                row["similarity"]
+            )
+            for row in rows
+        ]
+
     def search_by_vector(
         self,
-        embedding: List[float],
-        k: int = 4
+        embedding: Sequence[float],
+        k: int = 4,
+        filter_dict: Optional[dict] = None
     ) -> List[Tuple[Document, float]]:
         """
         Search for documents similar to a given embedding vector.
@@ -216,43 +713,57 @@ class VectorStoreService:
         Args:
             embedding: The query embedding vector
             k: Number of results to return
+            filter_dict: Optional metadata filter (e.g., {"page": 3})
 
         Returns:
             List of tuples (Document, similarity_score)
+            similarity_score is computed by match_documents in the same query
         """
-        # Use the underlying Supabase client for vector similarity search
-        # This is more advanced usage
-        results = self.vector_store.similarity_search_by_vector(
-            embedding=embedding,
-            k=k
-        )
+        response = self.supabase_client.rpc(
+            "match_documents",
+            {
+                "query_embedding": embedding,
+                "match_count": k,
+                "filter": filter_dict or {}
+            }
+        ).execute()
 
-        # Convert to (Document, score) tuples
-        # Note: When using similarity_search_by_vector, we don't get scores by default
-        # For simplicity, we'll return score as None or 1.0
-        return [(doc, 1.0) for doc in results]
+        return self._rows_to_results(response.data)
 
-    def delete_documents(self, document_ids: List[str]) -> bool:
+    def delete_documents(
+        self,
+        document_ids: List[str],
+        batch_size: int = 200
+    ) -> bool:
         """
         Delete documents from the vector store.
 
         Args:
             document_ids: List of document IDs to delete
+            batch_size: Number of IDs deleted per request (default: 200)
 
         Returns:
             True if deletion was successful
 
         Note:
-            This requires direct access to Supabase client
+            This requires direct access to Supabase client.
+            The IDs of an .in_() filter are sent in the request URL, so a
+            very long list can exceed URL length limits; we delete in
+            batches instead. To empty the whole table, use the
+            truncate_documents SQL function rather than deleting every ID.
         """
         try:
-            # Delete from Supabase table
-            self.supabase_client.table(self.table_name).delete().in_(
-                "id", document_ids
-            ).execute()
+            # Delete from Supabase table, one batch of IDs at a time
+            for i in range(0, len(document_ids), batch_size):
+                self.supabase_client.table(self.table_name).delete().in_(
+                    "id", document_ids[i:i + batch_size]
+                ).execute()
+
+            # Cached searches may return the deleted chunks
+            self.clear_search_cache()
             return True
         except Exception as e:
-            print(f"Error deleting documents: {e}")
+            logger.error("Error deleting documents: %s", e)
             return False
 
     def get_collection_stats(self) -> dict:
@@ -275,15 +786,18 @@ class VectorStoreService:
 
             return {
                 "total_documents": response.count if hasattr(response, 'count') else 0,
-                "table_name": self.table_name
+                "table_name": self.table_name,
+                "query_cache": self.query_cache.stats(),
+                "semantic_cache": self.semantic_cache.stats()
             }
         except Exception as e:
-            print(f"Error getting stats: {e}")
+            logger.error("Error getting stats: %s", e)
             return {"total_documents": 0, "table_name": self.table_name}
 
 
 # Global instance for easy access
 _vector_store_service = None
+_vector_store_lock = threading.Lock()
 
 
 def get_vector_store() -> VectorStoreService:
@@ -299,5 +813,20 @@ def get_vector_store() -> VectorStoreService:
     """
     global _vector_store_service
     if _vector_store_service is None:
-        _vector_store_service = VectorStoreService()
+        # Double-checked locking, so concurrent first calls create one service
+        with _vector_store_lock:
+            if _vector_store_service is None:
+                _vector_store_service = VectorStoreService()
     return _vector_store_service
+
+
+def close_vector_store() -> None:
+    """
+    Close the global vector store's Supabase connections.
+
+    Called on application shutdown.
+    """
+    global _vector_store_service
+    if _vector_store_service is not None:
+        _vector_store_service.close()
+        _vector_store_service = None
@@ -7,10 +7,37 @@ This is important because:
 2. Embeddings work better on focused, coherent chunks
 3. Retrieval is more precise when searching smaller, relevant pieces
 """
-from typing import List
+from functools import lru_cache
+from typing import List, Tuple
+
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
+# Split hierarchies
+TEXT_SEPARATORS = ("\n\n", "\n", " ", "")
+# Better separators for structured documents like CVs
+DOCUMENT_SEPARATORS = ("\n\n", "\n", ". ", " ", "")
+
+
+@lru_cache(maxsize=32)
+def _get_splitter(
+    chunk_size: int,
+    chunk_overlap: int,
+    separators: Tuple[str, ...]
+) -> RecursiveCharacterTextSplitter:
+    """
+    Get a text splitter for these settings, built once and then reused.
+
+    Splitters keep no state between calls, so one instance can be shared
+    by every upload (and thread).
+    """
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,  # Use character count
+        separators=list(separators)
+    )
+
 
 def chunk_text(
     text: str,
@@ -43,33 +70,23 @@ def chunk_text(
         >>> chunks = chunk_text(text, metadata={"source": "report.pdf"})
         >>> print(f"Created {len(chunks)} chunks")
     """
-    # Initialize the text splitter with our configuration
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        length_function=len,  # Use character count
-        separators=["\n\n", "\n", " ", ""]  # Split hierarchy
-    )
+    # Get the (cached) text splitter for our configuration
+    text_splitter = _get_splitter(chunk_size, chunk_overlap, TEXT_SEPARATORS)
 
     # Split the text into chunks
     chunks = text_splitter.split_text(text)
 
     # Convert plain text chunks into Document objects with metadata
-    documents = []
-    for i, chunk in enumerate(chunks):
-        # Create metadata for this chunk
-        chunk_metadata = metadata.copy() if metadata else {}
-        chunk_metadata["chunk_index"] = i
-        chunk_metadata["chunk_total"] = len(chunks)
-
-        # Create a Document object
-        doc = Document(
+    # (each chunk gets its own dict: the shared metadata plus its position)
+    base_metadata = metadata or {}
+    total = len(chunks)
+    return [
+        Document(
             page_content=chunk,
-            metadata=chunk_metadata
+            metadata={**base_metadata, "chunk_index": i, "chunk_total": total}
         )
-        documents.append(doc)
-
-    return documents
+        for i, chunk in enumerate(chunks)
+    ]
 
 
 def chunk_documents(
@@ -86,7 +103,7 @@ def chunk_documents(
     - Better for CV/resume documents where specific details matter
 
     This is useful when you've already loaded documents using LangChain loaders
-    (like PyPDFLoader or UnstructuredWordDocumentLoader).
+    (like PyMuPDFLoader or UnstructuredWordDocumentLoader).
 
     Args:
         documents: List of Document objects to chunk
@@ -97,26 +114,24 @@ def chunk_documents(
         List of chunked Document objects, preserving original metadata
 
     Example:
-        >>> from langchain.document_loaders import PyPDFLoader
-        >>> loader = PyPDFLoader("document.pdf")
+        >>> from langchain_community.document_loaders import PyMuPDFLoader
+        >>> loader = PyMuPDFLoader("document.pdf")
         >>> docs = loader.load()
         >>> chunked_docs = chunk_documents(docs)
     """
-    # Initialize the text splitter with IMPROVED settings
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        length_function=len,
-        # Better separators for structured documents like CVs
-        separators=["\n\n", "\n", ". ", " ", ""]
-    )
+    # Get the (cached) text splitter with IMPROVED settings
+    text_splitter = _get_splitter(chunk_size, chunk_overlap, DOCUMENT_SEPARATORS)
 
     # Split all documents
     chunked_docs = text_splitter.split_documents(documents)
 
     # Add chunk index information to metadata
+    # (split_documents deep-copies each source document's metadata per
+    # chunk, so writing to one chunk's metadata doesn't affect the others)
+    total = len(chunked_docs)
     for i, doc in enumerate(chunked_docs):
-        doc.metadata["chunk_index"] = i
-        doc.metadata["chunk_total"] = len(chunked_docs)
+        metadata = doc.metadata
+        metadata["chunk_index"] = i
+        metadata["chunk_total"] = total
 
     return chunked_docs
@@ -0,0 +1,55 @@
+-- ============================================================================
+-- Binary Quantized Similarity Search (optional, requires pgvector >= 0.7)
+-- ============================================================================
+-- Run this SQL in your Supabase SQL Editor (after fix_vector_dimensions.sql),
+-- then set BINARY_QUANTIZED_SEARCH=true in your .env file.
+--
+-- Each 384-dim float embedding takes 1536 bytes. Its binary quantized form
+-- (1 bit per dimension: positive or not) takes 48 bytes - 32x smaller.
+-- We index the bits and search them by Hamming distance, which is very
+-- cheap, then re-rank the best candidates with the exact float embeddings
+-- so result quality stays close to a full-precision search.
+-- ============================================================================
+
+-- Step 1: Store the quantized embedding next to the original
+-- (generated by Postgres, so inserts don't need to change)
+ALTER TABLE documents
+  ADD COLUMN IF NOT EXISTS embedding_bin bit(384)
+  GENERATED ALWAYS AS (binary_quantize(embedding)::bit(384)) STORED;
+
+-- Step 2: Index the bits for fast Hamming-distance search
+CREATE INDEX IF NOT EXISTS documents_embedding_bin_idx
+  ON documents USING hnsw (embedding_bin bit_hamming_ops);
+
+-- Step 3: Search the bits, then re-rank by exact cosine similarity
+CREATE OR REPLACE FUNCTION match_documents_binary(
+  query_embedding vector(384),
+  match_count int DEFAULT 5,
+  rerank_factor int DEFAULT 4  -- candidates to re-rank = match_count * rerank_factor
+)
+RETURNS TABLE (
+  id uuid,
+  content text,
+  metadata jsonb,
+  similarity float
+)
+LANGUAGE sql STABLE
+AS $$
+  SELECT
+    candidates.id,
+    candidates.content,
+    candidates.metadata,
+    1 - (candidates.embedding <=> query_embedding) AS similarity
+  FROM (
+    SELECT documents.id, documents.content, documents.metadata, documents.embedding
+    FROM documents
+    ORDER BY documents.embedding_bin <~> binary_quantize(query_embedding)::bit(384)
+    LIMIT match_count * rerank_factor
+  ) AS candidates
+  ORDER BY candidates.embedding <=> query_embedding
+  LIMIT match_count;
+$$;
+
+-- ============================================================================
+-- Done! Unfiltered searches can now use the binary index
+-- ============================================================================
@@ -0,0 +1,56 @@
+-- ============================================================================
+-- Document Management Helpers
+-- ============================================================================
+-- Run this SQL in your Supabase SQL Editor (after fix_vector_dimensions.sql).
+--
+-- /upload/list-documents used to download every chunk row and de-duplicate
+-- them by filename in Python. list_unique_documents does the de-duplication
+-- in Postgres and returns one row per document, so only a handful of rows
+-- cross the wire no matter how many chunks are stored.
+--
+-- /upload/clear-all used to DELETE every row through a "id >= zero UUID"
+-- filter, which Postgres evaluates row by row (and logs every deleted row).
+-- truncate_documents empties the table in a single metadata operation.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION list_unique_documents()
+RETURNS TABLE (
+  filename text,
+  document_id text,
+  file_type text,
+  id uuid,
+  chunk_count bigint
+)
+LANGUAGE sql STABLE
+AS $$
+  SELECT DISTINCT ON (documents.metadata->>'source')
+    documents.metadata->>'source' AS filename,
+    documents.metadata->>'document_id' AS document_id,
+    documents.metadata->>'file_type' AS file_type,
+    documents.id,
+    count(*) OVER (PARTITION BY documents.metadata->>'source') AS chunk_count
+  FROM documents
+  ORDER BY documents.metadata->>'source', documents.id DESC;
+$$;
+
+-- Empty the documents table (used by /upload/clear-all)
+CREATE OR REPLACE FUNCTION truncate_documents()
+RETURNS void
+LANGUAGE sql
+AS $$
+  TRUNCATE documents;
+$$;
+
+-- Only the backend (service_role key) may call these. Supabase lets
+-- PUBLIC/anon/authenticated execute new functions through /rpc by default,
+-- and TRUNCATE ignores Row Level Security, so without this anyone with the
+-- public anon key could empty the table.
+REVOKE EXECUTE ON FUNCTION truncate_documents() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION truncate_documents() TO service_role;
+
+REVOKE EXECUTE ON FUNCTION list_unique_documents() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION list_unique_documents() TO service_role;
+
+-- ============================================================================
+-- Done! Listing and clearing documents no longer scan every chunk
+-- ============================================================================
@@ -1,31 +1,72 @@
 """
 Download required NLTK data for document processing.
 Run this once to set up NLTK resources.
+
+Resources that are already installed are skipped, and the missing ones
+are downloaded in parallel (each download is mostly waiting on the network).
 """
+from concurrent.futures import ThreadPoolExecutor
+
 import nltk
+from nltk.downloader import Downloader
+
+# NLTK resource name -> path checked to see if it's already installed
+RESOURCES = {
+    # punkt_tab tokenizer
+    "punkt_tab": "tokenizers/punkt_tab",
+    # punkt (legacy, for compatibility)
+    "punkt": "tokenizers/punkt",
+    # averaged_perceptron_tagger (often needed by unstructured)
+    "averaged_perceptron_tagger": "taggers/averaged_perceptron_tagger",
+}
+
+
+def is_installed(path: str) -> bool:
+    """Check whether an NLTK resource is already on disk."""
+    try:
+        nltk.data.find(path)
+        return True
+    except LookupError:
+        return False
+
+
+# One Downloader shared by all threads, so the package index (an XML file
+# listing every NLTK resource) is fetched once instead of once per download
+downloader = Downloader()
+
+
+def download(resource: str) -> None:
+    """Download one resource and report the result."""
+    try:
+        downloader.download(resource, quiet=True)
+        # download()'s return value comes from an error flag on the shared
+        # Downloader, which parallel downloads overwrite, so check the disk
+        if is_installed(RESOURCES[resource]):
+            print(f"✅ {resource} downloaded successfully")
+        else:
+            print(f"⚠️  Error downloading {resource}")
+    except Exception as e:
+        print(f"⚠️  Error downloading {resource}: {e}")
+
 
 print("📥 Downloading required NLTK data...")
 
-# Download punkt_tab tokenizer
-try:
-    nltk.download('punkt_tab')
-    print("✅ punkt_tab downloaded successfully")
-except Exception as e:
-    print(f"⚠️  Error downloading punkt_tab: {e}")
-
-# Download punkt (legacy, for compatibility)
-try:
-    nltk.download('punkt')
-    print("✅ punkt downloaded successfully")
-except Exception as e:
-    print(f"⚠️  Error downloading punkt: {e}")
-
-# Download averaged_perceptron_tagger (often needed by unstructured)
-try:
-    nltk.download('averaged_perceptron_tagger')
-    print("✅ averaged_perceptron_tagger downloaded successfully")
-except Exception as e:
-    print(f"⚠️  Error downloading averaged_perceptron_tagger: {e}")
+missing = []
+for resource, path in RESOURCES.items():
+    if is_installed(path):
+        print(f"✅ {resource} already installed")
+    else:
+        missing.append(resource)
+
+if missing:
+    try:
+        # Load the index up front, before the threads need it
+        downloader.packages()
+    except Exception as e:
+        print(f"⚠️  Error loading the NLTK package index: {e}")
+    else:
+        with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+            list(executor.map(download, missing))
 
 print("\n✨ NLTK data download complete!")
 print("You can now upload documents.")
@@ -0,0 +1,41 @@
+-- ============================================================================
+-- Reuse Embeddings of Already-Stored Chunks
+-- ============================================================================
+-- Run this SQL in your Supabase SQL Editor (after fix_vector_dimensions.sql).
+--
+-- Re-uploading a file (common while developing) used to embed every chunk
+-- again. Each chunk now gets a SHA-256 hash of its text, and before
+-- embedding, the app looks up chunks with the same hash and reuses their
+-- embeddings. Only new text is embedded.
+--
+-- Rows are still inserted for every chunk, so the new upload gets its own
+-- document_id and filename - only the embedding work is skipped.
+-- ============================================================================
+
+-- Step 1: Hash of each chunk's text (generated by Postgres, so inserts
+-- don't need to change; the app computes the same hex SHA-256)
+ALTER TABLE documents
+  ADD COLUMN IF NOT EXISTS content_hash text
+  GENERATED ALWAYS AS (encode(sha256(convert_to(content, 'UTF8')), 'hex')) STORED;
+
+CREATE INDEX IF NOT EXISTS documents_content_hash_idx
+  ON documents (content_hash);
+
+-- Step 2: One stored embedding per known hash
+CREATE OR REPLACE FUNCTION find_embeddings_by_hash(hashes text[])
+RETURNS TABLE (
+  content_hash text,
+  embedding vector(384)
+)
+LANGUAGE sql STABLE
+AS $$
+  SELECT DISTINCT ON (documents.content_hash)
+    documents.content_hash,
+    documents.embedding
+  FROM documents
+  WHERE documents.content_hash = ANY(hashes);
+$$;
+
+-- ============================================================================
+-- Done! Re-uploaded chunks now reuse their stored embeddings
+-- ============================================================================
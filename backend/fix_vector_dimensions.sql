@@ -16,12 +16,16 @@ CREATE TABLE documents (
   id uuid PRIMARY KEY DEFAULT gen_random_uuid(),  -- Changed to UUID
   content text NOT NULL,
   metadata jsonb,
-  embedding vector(384) NOT NULL  -- Changed from 1536 to 384
+  embedding vector(384) NOT NULL,  -- Changed from 1536 to 384
+  created_at timestamptz NOT NULL DEFAULT now()
 );
 
 -- Step 3: Create index for fast similarity search
-CREATE INDEX ON documents USING ivfflat (embedding vector_cosine_ops)
-WITH (lists = 100);
+-- (HNSW works well on an empty table that fills up over time;
+-- IVFFlat needs existing rows to build good lists)
+CREATE INDEX documents_embedding_hnsw ON documents
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
 
 -- Step 4: Create the similarity search function with 384 dimensions
 CREATE OR REPLACE FUNCTION match_documents(
@@ -36,6 +40,7 @@ RETURNS TABLE (
   similarity float
 )
 LANGUAGE plpgsql
+SET hnsw.ef_search = 40  -- HNSW candidates explored per search
 AS $$
 BEGIN
   RETURN QUERY
@@ -0,0 +1,186 @@
+-- ============================================================================
+-- Half-Precision (halfvec) HNSW Index (optional, requires pgvector >= 0.7)
+-- ============================================================================
+-- Run this SQL in your Supabase SQL Editor after hnsw_index.sql and the
+-- other search helper files. It replaces their search functions, so run it
+-- again if you re-run one of those files. If you use iterative_scan.sql,
+-- run that again afterwards.
+--
+-- HNSW searches are limited by how fast index pages can be read. Indexing the
+-- embeddings at half precision (2 bytes per dimension instead of 4) halves
+-- the index size, so more of it stays in memory and each comparison reads
+-- half the bytes. Recall for cosine similarity is practically unchanged.
+--
+-- The table keeps its full-precision embedding column: nothing changes for
+-- inserts, and the similarity scores we return are still computed exactly.
+-- Only the ORDER BY (the part that uses the index) runs on halfvec.
+-- ============================================================================
+
+-- Step 1: Index the embeddings cast to halfvec
+CREATE INDEX IF NOT EXISTS documents_embedding_half_hnsw
+  ON documents USING hnsw ((embedding::halfvec(384)) halfvec_cosine_ops)
+  WITH (m = 16, ef_construction = 64);
+
+-- Step 2: Search through the halfvec index
+-- (the ORDER BY must match the indexed expression exactly)
+
+-- Metadata-filtered search (metadata @> filter)
+CREATE OR REPLACE FUNCTION match_documents(
+  query_embedding vector(384),
+  match_count int DEFAULT 5,
+  filter jsonb DEFAULT '{}'
+)
+RETURNS TABLE (
+  id uuid,
+  content text,
+  metadata jsonb,
+  similarity float
+)
+LANGUAGE plpgsql
+SET hnsw.ef_search = 40  -- HNSW candidates explored per search (see hnsw_index.sql)
+AS $$
+BEGIN
+  RETURN QUERY
+  SELECT
+    documents.id,
+    documents.content,
+    documents.metadata,
+    1 - (documents.embedding <=> query_embedding) AS similarity
+  FROM documents
+  WHERE documents.metadata @> COALESCE(filter, '{}')
+  ORDER BY documents.embedding::halfvec(384) <=> query_embedding::halfvec(384)
+  LIMIT match_count;
+END;
+$$;
+
+-- Search within one document (by document_id / filename)
+CREATE OR REPLACE FUNCTION match_documents_scoped(
+  query_embedding vector(384),
+  match_count int DEFAULT 5,
+  p_document_id text DEFAULT NULL,
+  p_source text DEFAULT NULL
+)
+RETURNS TABLE (
+  id uuid,
+  content text,
+  metadata jsonb,
+  similarity float
+)
+LANGUAGE plpgsql STABLE
+SET hnsw.ef_search = 40
+AS $$
+BEGIN
+  -- One query per filter combination, so every cached plan filters on a
+  -- plain column = value (which can use the btree index) instead of a
+  -- "p IS NULL OR column = p" condition it can't plan an index for
+  IF p_document_id IS NOT NULL THEN
+    RETURN QUERY
+    SELECT
+      documents.id,
+      documents.content,
+      documents.metadata,
+      1 - (documents.embedding <=> query_embedding) AS similarity
+    FROM documents
+    WHERE documents.document_id = p_document_id
+      AND (p_source IS NULL OR documents.source = p_source)
+    ORDER BY documents.embedding::halfvec(384) <=> query_embedding::halfvec(384)
+    LIMIT match_count;
+  ELSIF p_source IS NOT NULL THEN
+    RETURN QUERY
+    SELECT
+      documents.id,
+      documents.content,
+      documents.metadata,
+      1 - (documents.embedding <=> query_embedding) AS similarity
+    FROM documents
+    WHERE documents.source = p_source
+    ORDER BY documents.embedding::halfvec(384) <=> query_embedding::halfvec(384)
+    LIMIT match_count;
+  ELSE
+    RETURN QUERY
+    SELECT
+      documents.id,
+      documents.content,
+      documents.metadata,
+      1 - (documents.embedding <=> query_embedding) AS similarity
+    FROM documents
+    ORDER BY documents.embedding::halfvec(384) <=> query_embedding::halfvec(384)
+    LIMIT match_count;
+  END IF;
+END;
+$$;
+
+-- Search within the latest document
+CREATE OR REPLACE FUNCTION match_latest_document(
+  query_embedding vector(384),
+  match_count int DEFAULT 5
+)
+RETURNS TABLE (
+  id uuid,
+  content text,
+  metadata jsonb,
+  similarity float
+)
+LANGUAGE sql STABLE
+SET hnsw.ef_search = 40
+AS $$
+  WITH latest AS (
+    SELECT documents.source
+    FROM documents
+    ORDER BY documents.created_at DESC
+    LIMIT 1
+  )
+  SELECT
+    documents.id,
+    documents.content,
+    documents.metadata,
+    1 - (documents.embedding <=> query_embedding) AS similarity
+  FROM documents
+  WHERE documents.source = (SELECT source FROM latest)
+  ORDER BY documents.embedding::halfvec(384) <=> query_embedding::halfvec(384)
+  LIMIT match_count;
+$$;
+
+-- Several queries in one call (see multi_query_search.sql)
+CREATE OR REPLACE FUNCTION match_documents_many(
+  query_embeddings vector(384)[],
+  match_count int DEFAULT 5,
+  filter jsonb DEFAULT '{}'
+)
+RETURNS TABLE (
+  query_index int,
+  id uuid,
+  content text,
+  metadata jsonb,
+  similarity float
+)
+LANGUAGE plpgsql STABLE
+SET hnsw.ef_search = 40
+AS $$
+BEGIN
+  RETURN QUERY
+  SELECT
+    q.idx::int AS query_index,
+    d.id,
+    d.content,
+    d.metadata,
+    1 - (d.embedding <=> q.embedding) AS similarity
+  FROM unnest(query_embeddings) WITH ORDINALITY AS q(embedding, idx)
+  CROSS JOIN LATERAL (
+    SELECT documents.id, documents.content, documents.metadata, documents.embedding
+    FROM documents
+    WHERE documents.metadata @> COALESCE(filter, '{}')
+    ORDER BY documents.embedding::halfvec(384) <=> q.embedding::halfvec(384)
+    LIMIT match_count
+  ) AS d
+  ORDER BY q.idx, d.embedding <=> q.embedding;
+END;
+$$;
+
+-- Step 3: The full-precision index is no longer used by any search;
+-- dropping it saves memory and speeds up inserts
+DROP INDEX IF EXISTS documents_embedding_hnsw;
+
+-- ============================================================================
+-- Done! Similarity searches now use the half-precision index
+-- ============================================================================
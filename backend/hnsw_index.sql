@@ -0,0 +1,39 @@
+-- ============================================================================
+-- HNSW Index for Approximate Nearest-Neighbour Search
+-- ============================================================================
+-- Run this SQL in your Supabase SQL Editor (after fix_vector_dimensions.sql
+-- and the other search helper files). Needs pgvector >= 0.5.
+--
+-- Without a good index, every similarity search compares the query with
+-- every stored embedding. The IVFFlat index from older setups was built on
+-- an empty table, so its lists don't reflect the real data. HNSW needs no
+-- training data: it keeps a graph of nearby vectors that stays accurate as
+-- rows are inserted, and finds neighbours in roughly logarithmic time at
+-- the cost of ~1% recall.
+-- ============================================================================
+
+-- Step 1: Replace the IVFFlat index (if present) with HNSW
+DROP INDEX IF EXISTS documents_embedding_idx;
+
+CREATE INDEX IF NOT EXISTS documents_embedding_hnsw
+  ON documents USING hnsw (embedding vector_cosine_ops)
+  WITH (m = 16, ef_construction = 64);
+
+-- Step 2: Set how many candidates each search explores (default 40).
+-- Higher = better recall, slower queries. Must be >= match_count.
+-- The search functions already set this when (re)created from their
+-- .sql files; this updates functions created before that.
+ALTER FUNCTION match_documents(vector(384), int, jsonb)
+  SET hnsw.ef_search = 40;
+ALTER FUNCTION match_latest_document(vector(384), int)
+  SET hnsw.ef_search = 40;
+ALTER FUNCTION match_documents_scoped(vector(384), int, text, text)
+  SET hnsw.ef_search = 40;
+
+-- Step 3 (optional, pgvector >= 0.8): filtered searches can return fewer
+-- than match_count rows when the filter discards most HNSW candidates.
+-- Run iterative_scan.sql to let the index keep scanning in that case.
+
+-- ============================================================================
+-- Done! Similarity searches now use the HNSW index
+-- ============================================================================
@@ -0,0 +1,38 @@
+-- ============================================================================
+-- Iterative HNSW Index Scans for Filtered Searches (optional)
+-- ============================================================================
+-- Requires pgvector >= 0.8. Run this SQL in your Supabase SQL Editor after
+-- hnsw_index.sql (and again whenever you re-run one of the search files).
+--
+-- An HNSW index search looks at hnsw.ef_search candidates and only *then*
+-- applies the WHERE clause. When the filter is selective (one document out
+-- of many, a rare metadata value), most candidates are thrown away and the
+-- search can return fewer than match_count rows.
+--
+-- With iterative scans, the index keeps walking the graph until enough rows
+-- pass the filter. relaxed_order is the fastest mode; its results can be
+-- slightly out of order, so the app re-sorts the few returned rows by
+-- similarity.
+-- ============================================================================
+
+-- Metadata-filtered search (metadata @> filter)
+ALTER FUNCTION match_documents(vector(384), int, jsonb)
+  SET hnsw.iterative_scan = relaxed_order;
+ALTER FUNCTION match_documents(vector(384), int, jsonb)
+  SET hnsw.ef_search = 100;
+
+-- Search within one document (by document_id / filename)
+ALTER FUNCTION match_documents_scoped(vector(384), int, text, text)
+  SET hnsw.iterative_scan = relaxed_order;
+ALTER FUNCTION match_documents_scoped(vector(384), int, text, text)
+  SET hnsw.ef_search = 100;
+
+-- Search within the latest document
+ALTER FUNCTION match_latest_document(vector(384), int)
+  SET hnsw.iterative_scan = relaxed_order;
+ALTER FUNCTION match_latest_document(vector(384), int)
+  SET hnsw.ef_search = 100;
+
+-- ============================================================================
+-- Done! Filtered searches now return match_count rows whenever they exist
+-- ============================================================================
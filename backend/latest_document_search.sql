@@ -0,0 +1,53 @@
+-- ============================================================================
+-- Latest-Document Similarity Search
+-- ============================================================================
+-- Run this SQL in your Supabase SQL Editor (after metadata_columns.sql).
+--
+-- /ask/ queries only the most recently uploaded document by default. Instead
+-- of looking up the latest filename with a separate query and then running
+-- the similarity search, match_latest_document does both in one statement,
+-- saving a round-trip to Supabase on every question.
+-- ============================================================================
+
+-- Step 1: Track when each chunk was inserted
+-- (ordering by the random UUID primary key does not give the latest upload)
+ALTER TABLE documents
+  ADD COLUMN IF NOT EXISTS created_at timestamptz NOT NULL DEFAULT now();
+
+CREATE INDEX IF NOT EXISTS documents_created_at_idx
+  ON documents (created_at DESC);
+
+-- Step 2: Similarity search restricted to the latest document's source
+CREATE OR REPLACE FUNCTION match_latest_document(
+  query_embedding vector(384),
+  match_count int DEFAULT 5
+)
+RETURNS TABLE (
+  id uuid,
+  content text,
+  metadata jsonb,
+  similarity float
+)
+LANGUAGE sql STABLE
+SET hnsw.ef_search = 40  -- HNSW candidates explored per search (see hnsw_index.sql)
+AS $$
+  WITH latest AS (
+    SELECT documents.source
+    FROM documents
+    ORDER BY documents.created_at DESC
+    LIMIT 1
+  )
+  SELECT
+    documents.id,
+    documents.content,
+    documents.metadata,
+    1 - (documents.embedding <=> query_embedding) AS similarity
+  FROM documents
+  WHERE documents.source = (SELECT source FROM latest)
+  ORDER BY documents.embedding <=> query_embedding
+  LIMIT match_count;
+$$;
+
+-- ============================================================================
+-- Done! /ask/ can now search the latest document in a single query
+-- ============================================================================
@@ -0,0 +1,37 @@
+-- ============================================================================
+-- Typed Columns for the Document Filters (document_id, source)
+-- ============================================================================
+-- Run this SQL in your Supabase SQL Editor right after
+-- fix_vector_dimensions.sql, before the other helper files: the scoped and
+-- latest-document searches filter on these columns.
+--
+-- Almost every search is restricted to one document, by its document_id or
+-- its filename (source). Reading those from the metadata JSON means parsing
+-- jsonb for each candidate row. Stored as their own text columns, they are
+-- compared directly and indexed with small, plain btree indexes.
+--
+-- The columns are generated from metadata by Postgres, so inserts don't
+-- need to change and the two can never disagree.
+-- ============================================================================
+
+-- Step 1: Add the columns (filled in for existing rows as well)
+ALTER TABLE documents
+  ADD COLUMN IF NOT EXISTS document_id text
+  GENERATED ALWAYS AS (metadata->>'document_id') STORED;
+
+ALTER TABLE documents
+  ADD COLUMN IF NOT EXISTS source text
+  GENERATED ALWAYS AS (metadata->>'source') STORED;
+
+-- Step 2: Replace the JSON expression indexes (from older setups of
+-- scoped_document_search.sql) with indexes on the columns
+DROP INDEX IF EXISTS documents_document_id_idx;
+DROP INDEX IF EXISTS documents_source_idx;
+
+CREATE INDEX documents_document_id_idx ON documents (document_id);
+CREATE INDEX documents_source_idx ON documents (source);
+
+-- ============================================================================
+-- Done! Re-run scoped_document_search.sql and latest_document_search.sql
+-- (and halfvec_index.sql if you use it) so the searches use the new columns
+-- ============================================================================
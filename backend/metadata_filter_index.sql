@@ -0,0 +1,17 @@
+-- ============================================================================
+-- Indexed Metadata Filtering
+-- ============================================================================
+-- Run this SQL in your Supabase SQL Editor (after fix_vector_dimensions.sql).
+--
+-- match_documents filters chunks with `metadata @> filter` (e.g.
+-- {"page": 3}). Without an index, Postgres has to check the metadata of
+-- every row. A GIN index with jsonb_path_ops turns the containment check
+-- into an index lookup, so filtered searches only rank matching chunks.
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS documents_metadata_gin
+  ON documents USING gin (metadata jsonb_path_ops);
+
+-- ============================================================================
+-- Done! Metadata filters in match_documents now use the GIN index
+-- ============================================================================
@@ -0,0 +1,57 @@
+-- ============================================================================
+-- Multi-Query Similarity Search (several queries in one call)
+-- ============================================================================
+-- Run this SQL in your Supabase SQL Editor (after fix_vector_dimensions.sql).
+--
+-- Multi-step RAG often searches several sub-questions per user turn.
+-- match_documents_many takes all query embeddings at once and runs one
+-- index search per query through a LATERAL join, so the app makes one
+-- round-trip instead of one per query.
+--
+-- query_index is the 1-based position of the query in query_embeddings.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION match_documents_many(
+  query_embeddings vector(384)[],
+  match_count int DEFAULT 5,
+  filter jsonb DEFAULT '{}'
+)
+RETURNS TABLE (
+  query_index int,
+  id uuid,
+  content text,
+  metadata jsonb,
+  similarity float
+)
+LANGUAGE plpgsql STABLE
+SET hnsw.ef_search = 40  -- HNSW candidates explored per search (see hnsw_index.sql)
+AS $$
+BEGIN
+  RETURN QUERY
+  SELECT
+    q.idx::int AS query_index,
+    d.id,
+    d.content,
+    d.metadata,
+    1 - d.distance AS similarity
+  FROM unnest(query_embeddings) WITH ORDINALITY AS q(embedding, idx)
+  CROSS JOIN LATERAL (
+    -- The filter goes inside the LATERAL query, so each query still
+    -- gets match_count matching rows
+    SELECT
+      documents.id,
+      documents.content,
+      documents.metadata,
+      documents.embedding <=> q.embedding AS distance
+    FROM documents
+    WHERE documents.metadata @> COALESCE(filter, '{}')
+    ORDER BY documents.embedding <=> q.embedding
+    LIMIT match_count
+  ) AS d
+  ORDER BY q.idx, d.distance;
+END;
+$$;
+
+-- ============================================================================
+-- Done! VectorStoreService.search_many can now batch its searches
+-- ============================================================================
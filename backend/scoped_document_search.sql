@@ -0,0 +1,81 @@
+-- ============================================================================
+-- Scoped Similarity Search (filter by document ID and/or filename)
+-- ============================================================================
+-- Run this SQL in your Supabase SQL Editor (after metadata_columns.sql).
+--
+-- /ask/ usually restricts a search to one document (by document_id or by
+-- filename). Instead of passing a JSON filter that has to be parsed on every
+-- call, match_documents_scoped takes the two values as typed parameters.
+-- A NULL parameter means "don't filter on this field".
+--
+-- It is written in plpgsql so Postgres prepares the queries once per
+-- connection and reuses the cached plans on later calls. Each filter
+-- combination has its own query: a single "p IS NULL OR column = p" query
+-- would get one generic plan that can't use the column indexes.
+--
+-- It filters on the document_id and source columns (see
+-- metadata_columns.sql), whose indexes let Postgres find one document's
+-- chunks directly (pre-filtering) and rank only those, instead of scanning
+-- every row.
+-- ============================================================================
+
+-- Similarity search within the matching chunks
+CREATE OR REPLACE FUNCTION match_documents_scoped(
+  query_embedding vector(384),
+  match_count int DEFAULT 5,
+  p_document_id text DEFAULT NULL,
+  p_source text DEFAULT NULL
+)
+RETURNS TABLE (
+  id uuid,
+  content text,
+  metadata jsonb,
+  similarity float
+)
+LANGUAGE plpgsql STABLE
+SET hnsw.ef_search = 40  -- HNSW candidates explored per search (see hnsw_index.sql)
+AS $$
+BEGIN
+  -- One query per filter combination, so every cached plan filters on a
+  -- plain column = value (which can use the btree index) instead of a
+  -- "p IS NULL OR column = p" condition it can't plan an index for
+  IF p_document_id IS NOT NULL THEN
+    RETURN QUERY
+    SELECT
+      documents.id,
+      documents.content,
+      documents.metadata,
+      1 - (documents.embedding <=> query_embedding) AS similarity
+    FROM documents
+    WHERE documents.document_id = p_document_id
+      AND (p_source IS NULL OR documents.source = p_source)
+    ORDER BY documents.embedding <=> query_embedding
+    LIMIT match_count;
+  ELSIF p_source IS NOT NULL THEN
+    RETURN QUERY
+    SELECT
+      documents.id,
+      documents.content,
+      documents.metadata,
+      1 - (documents.embedding <=> query_embedding) AS similarity
+    FROM documents
+    WHERE documents.source = p_source
+    ORDER BY documents.embedding <=> query_embedding
+    LIMIT match_count;
+  ELSE
+    RETURN QUERY
+    SELECT
+      documents.id,
+      documents.content,
+      documents.metadata,
+      1 - (documents.embedding <=> query_embedding) AS similarity
+    FROM documents
+    ORDER BY documents.embedding <=> query_embedding
+    LIMIT match_count;
+  END IF;
+END;
+$$;
+
+-- ============================================================================
+-- Done! /ask/ can now filter by document without JSON filters
+-- ============================================================================
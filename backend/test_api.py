@@ -11,11 +11,30 @@ Usage:
 """
 import requests
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from typing import Optional
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # API base URL
 BASE_URL = "http://localhost:8000"
 
+# One session for every request, so connections to the API are kept alive
+# and reused instead of opening a new one per call
+_session = requests.Session()
+_session.mount(
+    "http://",
+    HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=16,
+        # Retries failed connections and GETs (never re-sends a POST)
+        max_retries=Retry(total=3, backoff_factor=0.2)
+    )
+)
+_session.headers["Connection"] = "keep-alive"
+
 
 def test_health_check():
     """Test if the API is running."""
@@ -24,7 +43,7 @@ def test_health_check():
     print("=" * 60)
 
     try:
-        response = requests.get(f"{BASE_URL}/health")
+        response = _session.get(f"{BASE_URL}/health")
         response.raise_for_status()
         print("✅ API is healthy!")
         print(f"Response: {response.json()}")
@@ -52,7 +71,7 @@ def test_upload_document(file_path: str):
         # Upload the file
         with open(file_path, "rb") as f:
             files = {"file": (os.path.basename(file_path), f)}
-            response = requests.post(f"{BASE_URL}/upload/", files=files)
+            response = _session.post(f"{BASE_URL}/upload/", files=files)
             response.raise_for_status()
 
         data = response.json()
@@ -70,8 +89,27 @@ def test_upload_document(file_path: str):
         return None
 
 
-def test_ask_question(question: str, use_tool_calling: bool = False):
-    """Test question answering."""
+def ask_question(question: str, use_tool_calling: bool = False) -> requests.Response:
+    """Send a question to the /ask/ endpoint."""
+    payload = {
+        "question": question,
+        "max_results": 3,
+        "use_tool_calling": use_tool_calling
+    }
+    return _session.post(f"{BASE_URL}/ask/", json=payload)
+
+
+def test_ask_question(
+    question: str,
+    use_tool_calling: bool = False,
+    response_future: Optional[Future] = None
+):
+    """
+    Test question answering.
+
+    Pass response_future to report on a request that is already running
+    (see main, which asks several questions in parallel).
+    """
     print("\n" + "=" * 60)
     print(f"Testing Question Answering")
     print("=" * 60)
@@ -79,13 +117,11 @@ def test_ask_question(question: str, use_tool_calling: bool = False):
     print(f"Tool calling: {use_tool_calling}")
 
     try:
-        # Ask a question
-        payload = {
-            "question": question,
-            "max_results": 3,
-            "use_tool_calling": use_tool_calling
-        }
-        response = requests.post(f"{BASE_URL}/ask/", json=payload)
+        # Ask a question (or wait for the one already sent)
+        if response_future is None:
+            response = ask_question(question, use_tool_calling)
+        else:
+            response = response_future.result()
         response.raise_for_status()
 
         data = response.json()
@@ -123,7 +159,7 @@ def test_stats():
     print("=" * 60)
 
     try:
-        response = requests.get(f"{BASE_URL}/upload/stats")
+        response = _session.get(f"{BASE_URL}/upload/stats")
         response.raise_for_status()
         data = response.json()
         print("✅ Stats retrieved!")
@@ -207,8 +243,11 @@ def main():
         "Can employees work remotely?",
     ]
 
-    for question in questions:
-        test_ask_question(question, use_tool_calling=False)
+    # Send them all at once, then report the answers in order
+    with ThreadPoolExecutor(max_workers=len(questions)) as executor:
+        futures = [executor.submit(ask_question, question) for question in questions]
+        for question, future in zip(questions, futures):
+            test_ask_question(question, use_tool_calling=False, response_future=future)
 
     # Test 6: Ask question with tool calling
     test_ask_question(